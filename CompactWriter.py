@@ -0,0 +1,141 @@
+"""
+PDF 1.5 output mode that packs non-stream objects into compressed object streams and writes a cross-reference stream.
+
+Merged files with many small objects (page dictionaries, annotations, font dictionaries, etc.) spend much of their
+size on uncompressed dictionaries and on the 20-byte-per-object xref table. Here the small objects are deflated
+together in object streams, and the cross-reference data is stored as a compressed binary stream instead.
+"""
+
+import math
+import zlib
+from io import BytesIO
+from typing import BinaryIO
+
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, EncodedStreamObject, NameObject, NumberObject, StreamObject
+
+
+def can_use_object_streams(writer: PdfWriter) -> bool:
+    """
+    Check if a writer can be written with object streams (encrypted output is written normally).
+
+    :param writer: Assembled PdfWriter
+    :return: True if the writer is not encrypted
+    """
+
+    return not writer._encryption
+
+
+def compact_object_count(writer: PdfWriter, objects_per_stream: int = 100) -> int:
+    """
+    Count the objects write_compact will end with an "endobj" marker (for progress reporting).
+
+    :param writer: Assembled PdfWriter
+    :param objects_per_stream: Maximum number of objects in each object stream
+    :return: Number of stream objects, object streams, and the cross-reference stream
+    """
+
+    streams = sum(1 for obj in writer._objects if isinstance(obj, StreamObject))
+    others = sum(1 for obj in writer._objects if obj is not None and not isinstance(obj, StreamObject))
+    return streams + math.ceil(others / objects_per_stream) + 1
+
+
+def write_compact(writer: PdfWriter, stream: BinaryIO, objects_per_stream: int = 100, level: int = 6) -> None:
+    """
+    Write a writer's objects using object streams and a cross-reference stream.
+
+    Stream objects are written directly (they cannot be put in object streams); all other objects are grouped into
+    object streams of up to objects_per_stream objects. Object streams and the cross-reference stream are numbered
+    after the writer's objects.
+
+    :param writer: Assembled PdfWriter (not encrypted)
+    :param stream: Binary output stream (must support tell)
+    :param objects_per_stream: Maximum number of objects in each object stream
+    :param level: zlib compression level (1-9) for the object streams and cross-reference stream
+    :return:
+    """
+
+    writer._resolve_links()  # Done by PdfWriter.write_stream for the standard output mode
+
+    object_count = len(writer._objects)
+    entries = [(0, 0, 65535)] + [(0, 0, 0)] * object_count  # (type, field 2, field 3) for each object number
+    next_number = object_count + 1
+
+    # Header (object streams need PDF 1.5)
+    header = writer.pdf_header if writer.pdf_header >= "%PDF-1.5" else "%PDF-1.5"
+    stream.write(header.encode() + b"\n")
+    stream.write(b"%\xE2\xE3\xCF\xD3\n")
+
+    def write_object(number: int, obj: StreamObject) -> None:
+        if number < len(entries):
+            entries[number] = (1, stream.tell(), 0)
+        else:  # Object stream (numbered in the order they are written)
+            entries.append((1, stream.tell(), 0))
+        stream.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(stream)
+        stream.write(b"\nendobj\n")
+
+    def write_object_stream(members: list[int]) -> None:
+        nonlocal next_number
+
+        # Object stream data: pairs of (object number, offset) followed by the objects
+        body = BytesIO()
+        pairs = []
+        for index, number in enumerate(members):
+            pairs.append(f"{number} {body.tell()}")
+            writer._objects[number - 1].write_to_stream(body)
+            body.write(b"\n")
+            entries[number] = (2, next_number, index)
+        pairs = (" ".join(pairs) + "\n").encode()
+
+        object_stream = EncodedStreamObject()
+        object_stream[NameObject("/Type")] = NameObject("/ObjStm")
+        object_stream[NameObject("/N")] = NumberObject(len(members))
+        object_stream[NameObject("/First")] = NumberObject(len(pairs))
+        object_stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+        object_stream._data = zlib.compress(pairs + body.getvalue(), level)
+
+        write_object(next_number, object_stream)
+        next_number += 1
+
+    # Objects: streams directly, everything else in object streams
+    members = []
+    for number, obj in enumerate(writer._objects, start=1):
+        if obj is None:
+            continue
+        if isinstance(obj, StreamObject):
+            write_object(number, obj)
+            continue
+
+        members.append(number)
+        if len(members) == objects_per_stream:
+            write_object_stream(members)
+            members = []
+
+    if len(members) > 0:
+        write_object_stream(members)
+
+    # Cross-reference stream (includes its own entry)
+    xref_number = next_number
+    xref_location = stream.tell()
+    entries.append((1, xref_location, 0))
+    offset_width = max(1, math.ceil(max(xref_location, xref_number).bit_length() / 8))
+    xref_data = b"".join(entry_type.to_bytes(1, "big") + field_2.to_bytes(offset_width, "big") +
+                         field_3.to_bytes(2, "big") for entry_type, field_2, field_3 in entries)
+
+    xref_stream = EncodedStreamObject()
+    xref_stream[NameObject("/Type")] = NameObject("/XRef")
+    xref_stream[NameObject("/Size")] = NumberObject(len(entries))
+    xref_stream[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(offset_width), NumberObject(2)])
+    xref_stream[NameObject("/Root")] = writer.root_object.indirect_reference
+    if writer._info is not None:
+        xref_stream[NameObject("/Info")] = writer._info.indirect_reference
+    if writer._ID is not None:
+        xref_stream[NameObject("/ID")] = writer._ID
+    xref_stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+    xref_stream._data = zlib.compress(xref_data, level)
+
+    stream.write(f"{xref_number} 0 obj\n".encode())
+    xref_stream.write_to_stream(stream)
+    stream.write(b"\nendobj\n")
+    stream.write(f"startxref\n{xref_location}\n%%EOF\n".encode())
@@ -43,6 +43,31 @@ class EditPreferencesFrame:
         else:
             self.preference_dict["Compress Output"] = False
 
+        if self.recompress_select.get():
+            self.preference_dict["Recompress Streams"] = True
+        else:
+            self.preference_dict["Recompress Streams"] = False
+
+        if self.optimize_images_select.get():
+            self.preference_dict["Optimize Images"] = True
+        else:
+            self.preference_dict["Optimize Images"] = False
+
+        if self.object_streams_select.get():
+            self.preference_dict["Object Streams"] = True
+        else:
+            self.preference_dict["Object Streams"] = False
+
+        if self.linearize_select.get():
+            self.preference_dict["Linearize Output"] = True
+        else:
+            self.preference_dict["Linearize Output"] = False
+
+        if self.streaming_select.get():
+            self.preference_dict["Streaming Output"] = True
+        else:
+            self.preference_dict["Streaming Output"] = False
+
         if self.fd_launch_select.get():
             self.preference_dict["Launch File Dialog to Script Folder"] = True
         else:
@@ -68,6 +93,11 @@ class EditPreferencesFrame:
         self.dark_mode_select.set(self.orig_preference_dict["Dark Mode"])
         self.combine_non_seq_select.set(self.orig_preference_dict["Combine Non-Sequential File Selections on Move"])
         self.compress_out_select.set(self.orig_preference_dict["Compress Output"])
+        self.recompress_select.set(self.orig_preference_dict["Recompress Streams"])
+        self.optimize_images_select.set(self.orig_preference_dict["Optimize Images"])
+        self.object_streams_select.set(self.orig_preference_dict["Object Streams"])
+        self.linearize_select.set(self.orig_preference_dict["Linearize Output"])
+        self.streaming_select.set(self.orig_preference_dict["Streaming Output"])
         self.fd_launch_select.set(self.orig_preference_dict["Launch File Dialog to Script Folder"])
 
         self.win.lift()
@@ -89,6 +119,11 @@ class EditPreferencesFrame:
                 self.preference_dict["Combine Non-Sequential File Selections on Move"] !=
                     self.combine_non_seq_select.get() or
                 self.compress_out_select.get() != self.preference_dict["Compress Output"] or
+                self.recompress_select.get() != self.preference_dict["Recompress Streams"] or
+                self.optimize_images_select.get() != self.preference_dict["Optimize Images"] or
+                self.object_streams_select.get() != self.preference_dict["Object Streams"] or
+                self.linearize_select.get() != self.preference_dict["Linearize Output"] or
+                self.streaming_select.get() != self.preference_dict["Streaming Output"] or
                 self.fd_launch_select.get() != self.preference_dict["Launch File Dialog to Script Folder"]):
             save = messagebox.askyesno(title="Unsaved Changes", message="You have unsaved changes. Would you like to "
                                                                         "save them before exiting?")
@@ -111,6 +146,11 @@ class EditPreferencesFrame:
         elif (self.orig_preference_dict["Combine Non-Sequential File Selections on Move"] !=
                 self.combine_non_seq_select.get() or
                 self.orig_preference_dict["Compress Output"] != self.compress_out_select.get() or
+                self.orig_preference_dict["Recompress Streams"] != self.recompress_select.get() or
+                self.orig_preference_dict["Optimize Images"] != self.optimize_images_select.get() or
+                self.orig_preference_dict["Object Streams"] != self.object_streams_select.get() or
+                self.orig_preference_dict["Linearize Output"] != self.linearize_select.get() or
+                self.orig_preference_dict["Streaming Output"] != self.streaming_select.get() or
                 self.orig_preference_dict["Launch File Dialog to Script Folder"] != self.fd_launch_select.get()):
             messagebox.showinfo(title="Save Successful", message="Changes saved successfully.")
 
@@ -229,6 +269,43 @@ class EditPreferencesFrame:
         Tooltip(self.compress_out_box, text="Use PdfWriter's compress_identical_objects method to reduce output file "
                                             "size")
 
+        self.recompress_select = BooleanVar(value=self.preference_dict["Recompress Streams"])
+        self.recompress_box = ttk.Checkbutton(self.compress_out_frame, variable=self.recompress_select,
+                                              text="Recompress Streams")
+        self.recompress_box.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        Tooltip(self.recompress_box, text="Deflate uncompressed or weakly compressed streams (e.g. from scanners) "
+                                          "again before writing the output")
+
+        self.optimize_images_select = BooleanVar(value=self.preference_dict["Optimize Images"])
+        self.optimize_images_box = ttk.Checkbutton(self.compress_out_frame, variable=self.optimize_images_select,
+                                                   text="Optimize Images")
+        self.optimize_images_box.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+        Tooltip(self.optimize_images_box, text="Downsample images above the target resolution (200 dpi by default). "
+                                               "Requires the Pillow package")
+
+        self.object_streams_select = BooleanVar(value=self.preference_dict["Object Streams"])
+        self.object_streams_box = ttk.Checkbutton(self.compress_out_frame, variable=self.object_streams_select,
+                                                  text="Object Streams")
+        self.object_streams_box.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        Tooltip(self.object_streams_box, text="Pack small objects into compressed object streams and write a "
+                                              "cross-reference stream (PDF 1.5). Not used for encrypted output")
+
+        self.linearize_select = BooleanVar(value=self.preference_dict["Linearize Output"])
+        self.linearize_box = ttk.Checkbutton(self.compress_out_frame, variable=self.linearize_select,
+                                             text="Linearize Output")
+        self.linearize_box.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        Tooltip(self.linearize_box, text="Linearize the output (\"fast web view\") so the first page can be shown "
+                                         "before the whole file has downloaded, then check its hint tables. Requires "
+                                         "the pikepdf package")
+
+        self.streaming_select = BooleanVar(value=self.preference_dict["Streaming Output"])
+        self.streaming_box = ttk.Checkbutton(self.compress_out_frame, variable=self.streaming_select,
+                                             text="Streaming Output")
+        self.streaming_box.grid(row=1, column=2, padx=5, pady=5, sticky="w")
+        Tooltip(self.streaming_box, text="Write page contents and other streams to the output as each file is added, "
+                                         "so they are not held in memory. Images are not optimized and object streams "
+                                         "are not used")
+
         # File dialog launch location (script or previous folder)
         self.fd_launch_frame = ttk.Frame(self.win)
         self.fd_launch_frame.grid(row=4, column=0, padx=5, pady=1, sticky="ew")
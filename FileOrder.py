@@ -0,0 +1,93 @@
+"""
+Reordering of the file list for the move buttons.
+
+The new position of every selected entry is calculated first, then only the part of the list between the first and
+last affected positions is rebuilt in a single pass. Entries outside that part are not touched, so the window only
+needs to redraw the returned range.
+"""
+
+from typing import Any
+
+
+def move_targets(selected: list[int], count: int, move: str, combine: bool) -> list[int]:
+    """
+    Calculate the new index of each selected entry.
+
+    Non-combined selections keep their spacing: moving to the top/bottom shifts every entry by the same amount, and
+    moving up/down moves every entry by one unless it is blocked by the end of the list or a blocked selected entry.
+    Combined selections are gathered together: at the top/bottom of the list, or starting at the first (up) or ending at
+    the last (down) selected index.
+
+    :param selected: Sorted list of selected indices
+    :param count: Number of entries in the list
+    :param move: "top", "up", "down", or "bottom"
+    :param combine: Flag for whether non-sequential selections should be moved next to each other
+    :return: List of new indices (in the same order as selected)
+    """
+
+    if len(selected) == 0:
+        return []
+
+    targets = []
+    if move == "top":
+        if combine:
+            targets = list(range(len(selected)))
+        else:
+            targets = [index - selected[0] for index in selected]
+
+    elif move == "bottom":
+        if combine:
+            targets = list(range(count - len(selected), count))
+        else:
+            targets = [index + count - 1 - selected[-1] for index in selected]
+
+    elif move == "up":
+        if combine:
+            targets = [selected[0] + i for i in range(len(selected))]
+        else:
+            for index in selected:
+                targets.append(max(index - 1, targets[-1] + 1 if len(targets) > 0 else 0))
+
+    elif move == "down":
+        if combine:
+            targets = [selected[-1] - len(selected) + 1 + i for i in range(len(selected))]
+        else:
+            for index in reversed(selected):
+                targets.append(min(index + 1, targets[-1] - 1 if len(targets) > 0 else count - 1))
+            targets.reverse()
+
+    return targets
+
+
+def apply_move(items: list[Any], selected: list[int], targets: list[int]) -> tuple[int, int]:
+    """
+    Move the selected entries to their new indices (in place); unselected entries keep their relative order.
+
+    :param items: List to reorder
+    :param selected: Sorted list of selected indices
+    :param targets: New index of each selected entry, as returned by move_targets
+    :return: Tuple of (first changed index, index after the last changed index); empty if nothing moved
+    """
+
+    if len(selected) == 0 or selected == targets:
+        return 0, 0
+
+    start = min(selected[0], targets[0])
+    stop = max(selected[-1], targets[-1]) + 1
+
+    # Place selected entries, then fill the remaining slots with the unselected entries in their original order
+    window = [None] * (stop - start)
+    filled = [False] * (stop - start)
+    for index, target in zip(selected, targets):
+        window[target - start] = items[index]
+        filled[target - start] = True
+
+    selected_set = set(selected)
+    others = (items[i] for i in range(start, stop) if i not in selected_set)
+    for i in range(stop - start):
+        if not filled[i]:
+            window[i] = next(others)
+
+    items[start:stop] = window
+
+    return start, stop
@@ -0,0 +1,246 @@
+"""
+Pool of open input files with a fixed maximum number of file descriptors.
+
+pypdf keeps every reader whose pages were added to a PdfWriter, so a reader holding its own file (or memory map, which
+keeps a descriptor on most systems) for the whole merge would use one descriptor per input. Readers instead read
+through PooledFile objects. The pool keeps at most max_handles files open, closing the least recently used file when
+another is needed; a PooledFile whose file was closed reopens it on its next read.
+"""
+
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Union
+
+# Bytes read ahead by each PooledFile
+read_ahead = 8192
+
+
+class PooledFile:
+    """Read-only, seekable file object that reads through a HandlePool instead of holding its own descriptor."""
+
+    def __init__(self, pool: "HandlePool", path: str) -> None:
+        """
+        Create a file object for a path. The file is opened by the pool on the first read.
+
+        :param pool: HandlePool used for reading
+        :param path: Full path name of the file
+        :raises OSError: The file cannot be accessed
+        """
+
+        self.pool = pool
+        self.path = path
+        stat = os.stat(path)
+        self.key = (path, stat.st_mtime, stat.st_size)  # Files are shared and reopened only while this matches
+        self.size = stat.st_size
+        self.position = 0
+        self.closed = False
+        self.buffer = b""  # Bytes read ahead, starting at buffer_start
+        self.buffer_start = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read bytes from the current position.
+
+        :param size: Maximum number of bytes to read (all remaining bytes if negative)
+        :return: Bytes read (empty at the end of the file)
+        :raises ValueError: The file was closed
+        """
+
+        # Fast path: small read served from the read-ahead buffer (pypdf parses with many single-byte reads)
+        offset = self.position - self.buffer_start
+        if 0 <= size and 0 <= offset and offset + size <= len(self.buffer):
+            self.position += size
+            return self.buffer[offset:offset + size]
+
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+        remaining = max(self.size - self.position, 0)
+        size = remaining if size < 0 else min(size, remaining)
+        if size == 0:
+            return b""
+
+        # Refill the read-ahead buffer for small reads; read larger blocks (e.g. stream data) directly
+        if size < read_ahead:
+            self.buffer = self.pool.read(self, self.position, min(read_ahead, remaining))
+            self.buffer_start = self.position
+            data = self.buffer[:size]
+        else:
+            data = self.pool.read(self, self.position, size)
+
+        self.position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """
+        Change the current position.
+
+        :param offset: Offset relative to whence
+        :param whence: 0 for the start of the file, 1 for the current position, 2 for the end of the file
+        :return: New position
+        """
+
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position.")
+
+        self.position = offset
+        return self.position
+
+    def tell(self) -> int:
+        """Return the current position."""
+        return self.position
+
+    def close(self) -> None:
+        """Close the file object and the pool's open file for its path (reopened if another file object reads it)."""
+
+        self.closed = True
+        self.buffer = b""
+        self.pool.close_path(self.path)
+
+
+class HandlePool:
+    """Least-recently-used pool of open files (or read-only memory maps) with usage counters."""
+
+    def __init__(self, max_handles: int = 256, memory_map: bool = True) -> None:
+        """
+        Create an empty pool.
+
+        :param max_handles: Maximum number of files kept open at once
+        :param memory_map: Flag for whether files are read through memory maps (plain reads otherwise)
+        """
+
+        self.max_handles = max(1, max_handles)
+        self.memory_map = memory_map
+        self.handles = OrderedDict()  # Open files or memory maps keyed by PooledFile.key, least recently used first
+        self.opened_keys = set()  # Keys opened at least once (to count reopens)
+        self.lock = threading.Lock()  # Shared by the window and merge threads
+
+        # Counters
+        self.hits = 0  # Reads served by a file that was already open
+        self.opens = 0  # Files opened (including reopens)
+        self.reopens = 0  # Files opened again after being closed to stay within max_handles
+        self.peak_handles = 0  # Most files open at once
+
+    def open(self, path: str) -> PooledFile:
+        """
+        Create a file object reading through the pool.
+
+        :param path: Full path name of the file
+        :return: PooledFile for the path
+        :raises OSError: The file cannot be accessed
+        """
+
+        return PooledFile(self, path)
+
+    def set_limits(self, max_handles: int, memory_map: bool) -> None:
+        """
+        Change the maximum number of open files and the reading mode, closing files if needed.
+
+        :param max_handles: Maximum number of files kept open at once
+        :param memory_map: Flag for whether files are read through memory maps
+        :return:
+        """
+
+        with self.lock:
+            self.max_handles = max(1, max_handles)
+            if memory_map != self.memory_map:
+                self.memory_map = memory_map
+                self._close_oldest(0)
+            self._close_oldest(self.max_handles)
+
+    def _close_oldest(self, keep: int) -> None:
+        """
+        Close least recently used files until at most keep files are open.
+
+        :param keep: Number of files to leave open
+        :return:
+        """
+
+        while len(self.handles) > keep:
+            self.handles.popitem(last=False)[1].close()
+
+    def _open_handle(self, file: PooledFile) -> Union[mmap.mmap, BinaryIO]:
+        """
+        Open a file for the pool, closing the least recently used file if the pool is full.
+
+        :param file: PooledFile being read
+        :return: Memory map of the file, or a file object if memory maps are disabled or the file cannot be mapped
+        :raises OSError: The file cannot be opened or has changed since the PooledFile was created
+        """
+
+        stat = os.stat(file.path)
+        if (file.path, stat.st_mtime, stat.st_size) != file.key:
+            raise OSError(f"The file \"{file.path}\" changed on disk while it was being read.")
+
+        self._close_oldest(self.max_handles - 1)
+
+        handle = open(file.path, "rb")
+        if self.memory_map:
+            try:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                handle.close()
+                handle = mapped
+            except (OSError, ValueError):  # Cannot be mapped; read it normally
+                pass
+
+        self.handles.update({file.key: handle})
+        self.opens += 1
+        if file.key in self.opened_keys:
+            self.reopens += 1
+        self.opened_keys.add(file.key)
+        self.peak_handles = max(self.peak_handles, len(self.handles))
+
+        return handle
+
+    def read(self, file: PooledFile, position: int, size: int) -> bytes:
+        """
+        Read bytes for a PooledFile, opening its file if needed.
+
+        :param file: PooledFile being read
+        :param position: Offset of the first byte
+        :param size: Number of bytes to read
+        :return: Bytes read
+        :raises OSError: The file cannot be opened or has changed since the PooledFile was created
+        """
+
+        with self.lock:
+            handle = self.handles.get(file.key)
+            if handle is None:
+                handle = self._open_handle(file)
+            else:
+                self.handles.move_to_end(file.key)
+                self.hits += 1
+
+            if isinstance(handle, mmap.mmap):
+                return handle[position:position + size]
+
+            handle.seek(position)
+            return handle.read(size)
+
+    def close_path(self, path: str) -> None:
+        """
+        Close the open files for a path (if any), e.g. so the file can be replaced.
+
+        :param path: Full path name of the file
+        :return:
+        """
+
+        with self.lock:
+            for key in [key for key in self.handles.keys() if key[0] == path]:
+                self.handles.pop(key).close()
+
+    def close_all(self) -> None:
+        """Close every open file (file objects reopen them on their next read)."""
+
+        with self.lock:
+            self._close_oldest(0)
+
+
+# Pool shared by every reader in the process
+handle_pool = HandlePool()
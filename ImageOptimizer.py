@@ -0,0 +1,277 @@
+"""
+Downsampling and recompression of the images on the pages of a PdfWriter.
+
+Each image XObject drawn by a page is checked against a target resolution. The resolution is calculated from the size
+the image is drawn at, found by following the transformation matrix through the page's content stream (and the content
+streams of the form XObjects it draws). Images shared by several pages, placements, or files are processed once, using
+their largest placement, so no placement is reduced below the target. The work is done in a process pool because
+Pillow's resampling holds the GIL.
+
+Requires Pillow; optimize_images does nothing if it is not installed.
+"""
+
+import hashlib
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+from pypdf import PdfWriter
+from pypdf.generic import (ContentStream, DictionaryObject, EncodedStreamObject, NameObject, NumberObject, PdfObject,
+                           StreamObject)
+
+try:
+    from PIL import Image
+    pillow_available = True
+except ModuleNotFoundError:
+    Image = None
+    pillow_available = False
+
+# Color spaces Pillow can read and write directly, with their Pillow modes
+image_modes = {"/DeviceGray": "L", "/DeviceRGB": "RGB"}
+
+
+def optimize_image(data: bytes, stream_filter: str, width: int, height: int, mode: str, scale: float,
+                   quality: int) -> Optional[tuple[bytes, int, int]]:
+    """
+    Downsample one image. Runs in a worker process.
+
+    JPEG (DCTDecode) images are saved as JPEG at the given quality; lossless (FlateDecode or unfiltered) images are
+    deflated again so they stay lossless.
+
+    :param data: Image stream data as stored in the PDF
+    :param stream_filter: "/DCTDecode", "/FlateDecode", or "" for unfiltered data
+    :param width: Image width in pixels
+    :param height: Image height in pixels
+    :param mode: Pillow mode ("L" or "RGB")
+    :param scale: Fraction of the original width and height to keep
+    :param quality: JPEG quality (1-95)
+    :return: Tuple of (new stream data, new width, new height), or None if the image could not be read
+    """
+
+    try:
+        if stream_filter == "/DCTDecode":
+            image = Image.open(BytesIO(data))
+            image.load()
+        else:
+            raw = zlib.decompress(data) if stream_filter == "/FlateDecode" else data
+            image = Image.frombytes(mode, (width, height), raw)
+    except (OSError, ValueError, zlib.error):
+        return None
+
+    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    image = image.resize(new_size, Image.LANCZOS)
+
+    if stream_filter == "/DCTDecode":
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue(), *new_size
+
+    return zlib.compress(image.tobytes(), 9), *new_size
+
+
+def multiply(first: list[float], second: list[float]) -> list[float]:
+    """
+    Multiply two PDF transformation matrices.
+
+    :param first: Matrix [a b c d e f] applied first (e.g. the matrix of a cm operator)
+    :param second: Matrix [a b c d e f] applied second (e.g. the current transformation matrix)
+    :return: Combined matrix [a b c d e f]
+    """
+
+    a, b, c, d, e, f = first
+    a2, b2, c2, d2, e2, f2 = second
+    return [a * a2 + b * c2, a * b2 + b * d2, c * a2 + d * c2, c * b2 + d * d2, e * a2 + f * c2 + e2,
+            e * b2 + f * d2 + f2]
+
+
+def resource_images(resources: Optional[PdfObject], checked: set[int]) -> set[int]:
+    """
+    Find the image XObjects in resources (directly or through form XObjects).
+
+    :param resources: Resource dictionary (or reference to one)
+    :param checked: Object numbers of the form XObjects already searched (updated)
+    :return: Object numbers of the image XObjects found
+    """
+
+    resources = resources.get_object() if resources is not None else None
+    if not isinstance(resources, DictionaryObject) or "/XObject" not in resources:
+        return set()
+
+    found = set()
+    for reference in resources["/XObject"].get_object().values():
+        if not hasattr(reference, "idnum"):  # Direct objects cannot be replaced
+            continue
+        obj = reference.get_object()
+        if obj.get("/Subtype") == "/Image":
+            found.add(reference.idnum)
+        elif obj.get("/Subtype") == "/Form" and reference.idnum not in checked:
+            checked.add(reference.idnum)
+            found.update(resource_images(obj.get("/Resources"), checked))
+
+    return found
+
+
+def find_placements(content: ContentStream, resources: Optional[PdfObject], matrix: list[float],
+                    images: dict[int, float], forms: tuple[int, ...] = ()) -> None:
+    """
+    Follow the transformation matrix through a content stream and record the resolution of each image it draws.
+
+    :param content: Page or form XObject content stream
+    :param resources: Resource dictionary used by the content stream
+    :param matrix: Transformation matrix at the start of the content stream
+    :param images: Dictionary of the lowest resolution (dots per inch) keyed by image object number (updated)
+    :param forms: Object numbers of the form XObjects being drawn (to stop at self-referencing forms)
+    :return:
+    """
+
+    resources = resources.get_object() if resources is not None else None
+    xobjects = resources.get("/XObject") if isinstance(resources, DictionaryObject) else None
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+
+    saved = []  # Matrices saved by q operators
+    for operands, operator in content.operations:
+        if operator == b"q":
+            saved.append(matrix)
+        elif operator == b"Q":
+            if len(saved) > 0:
+                matrix = saved.pop()
+        elif operator == b"cm" and len(operands) == 6:
+            matrix = multiply([float(value) for value in operands], matrix)
+        elif operator == b"Do" and len(operands) == 1 and operands[0] in xobjects.keys():
+            reference = xobjects.raw_get(operands[0])
+            if not hasattr(reference, "idnum"):  # Direct objects cannot be replaced
+                continue
+            obj = reference.get_object()
+
+            if obj.get("/Subtype") == "/Image":
+                # The image fills the unit square of the current matrix
+                width = math.hypot(matrix[0], matrix[1]) / 72  # Inches
+                height = math.hypot(matrix[2], matrix[3]) / 72
+                if width <= 0 or height <= 0:
+                    continue
+                dpi = max(int(obj.get("/Width", 0)) / width, int(obj.get("/Height", 0)) / height)
+                images.update({reference.idnum: min(dpi, images.get(reference.idnum, dpi))})
+
+            elif obj.get("/Subtype") == "/Form" and reference.idnum not in forms:
+                form_matrix = [float(value) for value in obj.get("/Matrix", [1, 0, 0, 1, 0, 0])]
+                find_placements(ContentStream(obj, None), obj.get("/Resources", resources),
+                                multiply(form_matrix, matrix), images, (*forms, reference.idnum))
+
+
+def find_page_images(writer: PdfWriter) -> dict[int, float]:
+    """
+    Find the image XObjects drawn by each page (directly or through form XObjects) and calculate their resolution from
+    the size they are drawn at. Only pages with images in their resources are parsed.
+
+    Images that are not drawn by a page's content stream (e.g. only used by annotations or patterns) are not included.
+    Images of pages whose content stream cannot be parsed get a resolution of 0, so they are never downsampled.
+
+    :param writer: Assembled PdfWriter
+    :return: Dictionary of the lowest resolution (dots per inch) keyed by image object number
+    """
+
+    images = {}
+    for page in writer.pages:
+        page_images = resource_images(page.get("/Resources"), set())
+        if len(page_images) == 0:
+            continue
+
+        placements = {}
+        try:
+            content = page.get_contents()
+            if content is not None:
+                find_placements(content, page.get("/Resources"), [1, 0, 0, 1, 0, 0], placements)
+        except Exception:  # Any parsing failure leaves the page's images unchanged
+            placements = {idnum: 0.0 for idnum in page_images}
+
+        for idnum, dpi in placements.items():
+            images.update({idnum: min(dpi, images.get(idnum, dpi))})
+
+    return images
+
+
+def can_optimize(obj: StreamObject) -> bool:
+    """
+    Check if an image can be downsampled without changing how it is decoded.
+
+    :param obj: Image XObject
+    :return: True for 8-bit gray or RGB images that are JPEG, Flate (without predictors), or unfiltered
+    """
+
+    stream_filter = obj.get("/Filter", "")
+    return (stream_filter in ("", "/DCTDecode", "/FlateDecode") and obj.get("/ColorSpace") in image_modes and
+            obj.get("/BitsPerComponent") == 8 and "/DecodeParms" not in obj and "/Decode" not in obj and
+            not obj.get("/ImageMask", False))
+
+
+def optimize_images(writer: PdfWriter, target_dpi: int = 200, quality: int = 75,
+                    max_workers: int = 0) -> list[tuple[int, int, int, int]]:
+    """
+    Downsample the images of a writer that are above the target resolution, replacing those that become smaller.
+
+    Images with identical data are only processed once.
+
+    :param writer: Assembled PdfWriter
+    :param target_dpi: Resolution (dots per inch) to reduce images to
+    :param quality: JPEG quality (1-95) for JPEG images
+    :param max_workers: Maximum number of worker processes (0 uses one per CPU core)
+    :return: List of (object number, estimated resolution, original bytes, new bytes) tuples for replaced images
+    """
+
+    if not pillow_available:
+        return []
+
+    # Find images above the target resolution
+    jobs = {}  # (object numbers, estimated resolution) keyed by data hash and scale
+    job_args = {}
+    for idnum, dpi in find_page_images(writer).items():
+        obj = writer.get_object(idnum)
+        if dpi <= target_dpi or not can_optimize(obj):
+            continue
+
+        scale = round(target_dpi / dpi, 3)
+        key = (hashlib.sha256(obj._data).hexdigest(), scale)
+        if key not in jobs.keys():
+            jobs.update({key: ([], dpi)})
+            job_args.update({key: (obj._data, obj.get("/Filter", ""), int(obj["/Width"]), int(obj["/Height"]),
+                                   image_modes[obj["/ColorSpace"]], scale, quality)})
+        jobs[key][0].append(idnum)
+
+    if len(jobs) == 0:
+        return []
+
+    # Process each distinct image once in the pool
+    results = []
+    with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(jobs))) as executor:
+        futures = {key: executor.submit(optimize_image, *args) for key, args in job_args.items()}
+
+        for key, future in futures.items():
+            result = future.result()
+            if result is None:
+                continue
+
+            data, width, height = result
+            for idnum in jobs[key][0]:
+                old = writer.get_object(idnum)
+                if len(data) >= len(old._data):
+                    continue
+
+                # Replace with an encoded stream using the same object number
+                new = EncodedStreamObject()
+                new.update({name: value for name, value in old.items() if name not in ("/Filter", "/Length")})
+                new[NameObject("/Width")] = NumberObject(width)
+                new[NameObject("/Height")] = NumberObject(height)
+                if old.get("/Filter", "") == "/DCTDecode":
+                    new[NameObject("/Filter")] = NameObject("/DCTDecode")
+                else:
+                    new[NameObject("/Filter")] = NameObject("/FlateDecode")
+                new._data = data
+                new.indirect_reference = old.indirect_reference
+                writer._objects[idnum - 1] = new
+
+                results.append((idnum, round(jobs[key][1]), len(old._data), len(data)))
+
+    return results
@@ -0,0 +1,79 @@
+"""
+Linearization ("fast web view") of written PDF files, with a check of the result.
+
+A linearized file starts with the first page's objects and hint tables giving the byte ranges of every page, so viewers
+can show page 1 and seek to other pages with HTTP range requests before the whole file has downloaded. The hint tables
+depend on the final byte offset of every object, so this is done to the finished output file using qpdf (through the
+pikepdf package) rather than while pypdf writes it.
+
+Requires pikepdf; linearize_file does nothing if it is not installed.
+"""
+
+import os
+import sys
+from io import StringIO
+
+try:
+    import pikepdf
+    pikepdf_available = True
+except ModuleNotFoundError:
+    pikepdf = None
+    pikepdf_available = False
+
+
+def linearize_file(path: str) -> None:
+    """
+    Rewrite a PDF file as a linearized file. The result is written to a temporary file in the same folder, which then
+    replaces the original, so the original is kept if linearization fails.
+
+    Object streams in the file are kept (the first page's objects are moved out of them as linearization requires).
+
+    :param path: Full path name of the PDF file
+    :return:
+    :raises OSError: The file could not be read or written by qpdf
+    """
+
+    if not pikepdf_available:
+        return
+
+    temp_path = f"{path}.tmp"
+    try:
+        with pikepdf.open(path) as pdf:
+            pdf.save(temp_path, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.preserve)
+        os.replace(temp_path, path)
+    except pikepdf.PdfError as error:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise OSError(f"The file could not be linearized ({error})") from error
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def check_linearization(path: str) -> tuple[bool, str]:
+    """
+    Check the linearization parameter dictionary and hint tables of a file against its actual object offsets.
+
+    :param path: Full path name of the PDF file
+    :return: Tuple of (True if the file is linearized with no errors or warnings, qpdf's report of the problems found)
+    """
+
+    if not pikepdf_available:
+        return False, "The \"pikepdf\" package is not installed."
+
+    with pikepdf.open(path) as pdf:
+        if not pdf.is_linearized:
+            return False, "The file is not linearized."
+
+        # pikepdf replaces sys.stderr with the report stream, so the original is restored afterwards. qpdf reports
+        # most problems as warnings rather than to the stream.
+        report = StringIO()
+        stderr = sys.stderr
+        try:
+            passed = pdf.check_linearization(report)
+        finally:
+            sys.stderr = stderr
+        problems = [line for line in [report.getvalue().strip(), *pdf.get_warnings()] if line]
+
+    return passed, "\n".join(problems)
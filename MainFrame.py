@@ -1,16 +1,19 @@
 from ScrollableFrame import *
 from EditPreferencesFrame import *
 from PageSelection import *
+from FileOrder import apply_move, move_targets
+from SizeTracker import SizeTracker
 from Tooltip import Tooltip
 from tkinter import messagebox, filedialog
 import os
 import sys
 import copy
+import bisect
+import queue
 import subprocess
 from threading import Thread
 from datetime import datetime
 import pickle
-from io import BytesIO
 
 init_path = os.path.dirname(sys.argv[0]) + "\\Files"
 sys.path.append(init_path)
@@ -30,6 +33,8 @@ except ModuleNotFoundError:
         messagebox.showerror(title="Missing pypdf", message="Please install the pypdf package.")
         raise ModuleNotFoundError
 
+from MergeEngine import *
+
 def get_path_name(extension: str) -> str:
     """
     Prompt the user to select a file with the given extension.
@@ -105,23 +110,31 @@ class MainFrame:
         self.font_type = preferences["Font Type"]
         self.font_size = int(preferences["Font Size"])
         self.pref_file = pref_file
+        pdf_cache.set_memory_budget(int(preferences["Reader Cache Size (MB)"]) * 1024 ** 2)
+        handle_pool.set_limits(int(preferences["Max Open Files"]), preferences["Memory-Map Inputs"])
+        pdf_cache.load_index(os.path.join(os.path.dirname(pref_file) if pref_file else init_path,
+                                          "Metadata Index.pkl"))  # Stored next to the preferences file
 
         # Other parameters
         self.header_str = "Start adding files using the frame above."
         self.file_info = []  # List of (full path, file name, unique ID) tuples
+        self.index_labels = []  # Row widgets (one per visible row of the virtual file list)
         self.checkboxes = []
         self.check_states = []
+        self.name_labels = []
+        self.name_tooltips = []
+        self.placeholders = []
         self.placeholder_deleted = False
-        self.selected_indices = []
+        self.selected_indices = []  # Sorted list of selected file_info indices
         self.selected_pages = {}  # Stores info from the page_sel window in the right-click event handler
-        self.write_pages = {}  # Stores "cleaned" info from the selected_pages dictionary
         self.next_id = 0  # Next unique ID to use
+        self.file_sizes = SizeTracker()  # Running total of listed file sizes
 
         # Merger frame attributes
         self.is_writing = False
         self.files_writen = False
         self.merger_frame = None
-        self.merger = None
+        self.engine = None
         self.save_path = ""
         self.total_size = 0
 
@@ -174,19 +187,24 @@ class MainFrame:
 
         ttk.Label(border_frame, text="File Names:").grid(row=0, column=2, padx=(1, 5), pady=1, sticky="w")
 
+        #       Virtual file list: only enough rows to fill the screen are drawn and reused while scrolling
+        row_height = max(font.Font(family=self.font_type, size=self.font_size).metrics("linespace"), 20) + 1
+        visible_rows = max(10, (self.win.winfo_screenheight() - 400) // row_height)
         self.scroll_frame = ScrollableFrame(self.selected_frame, dark_mode=self.dark_mode, location=[0, 1], span=[1, 1],
-                                            dims="y")
+                                            dims="y", virtual_rows=visible_rows)
+        self.scroll_frame.set_row_callbacks(create_row=self.create_row, fill_row=self.fill_row)
 
         #       Placeholders
         style = ttk.Style()
         style.configure("Hidden.TLabel", foreground=str(self.win.cget("bg")), background=str(self.win.cget("bg")))
-        ttk.Label(self.scroll_frame, text="      0:", style="Hidden.TLabel").grid(row=0, column=0, padx=(5, 1),
-                                                                                  pady=0.5, sticky="e")
-        blank = ttk.Checkbutton(self.scroll_frame)
-        blank.grid(row=0, column=1, padx=1, pady=0.5)
-        blank.state(["!selected", "!alternate"])
+        self.placeholders.append(ttk.Label(self.scroll_frame, text="      0:", style="Hidden.TLabel"))
+        self.placeholders[-1].grid(row=0, column=0, padx=(5, 1), pady=0.5, sticky="e")
+        self.placeholders.append(ttk.Checkbutton(self.scroll_frame))
+        self.placeholders[-1].grid(row=0, column=1, padx=1, pady=0.5)
+        self.placeholders[-1].state(["!selected", "!alternate"])
 
-        ttk.Label(self.scroll_frame, text=self.header_str).grid(row=0, column=2, padx=(1, 5), pady=0.5)
+        self.placeholders.append(ttk.Label(self.scroll_frame, text=self.header_str))
+        self.placeholders[-1].grid(row=0, column=2, padx=(1, 5), pady=0.5)
 
         #       File count
         self.file_count = ttk.Label(self.selected_frame, text="  0 files selected (0.0 MB)")
@@ -267,6 +285,7 @@ class MainFrame:
         self.min_size = (self.win.winfo_reqwidth(), self.win.winfo_reqheight())
         self.win.maxsize(self.win.winfo_reqwidth(), self.win.winfo_screenheight() - 80)
         self.win.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.size_poll = self.win.after(ms=250, func=self.poll_file_sizes)
 
         self.path_entry.focus_set()
 
@@ -328,27 +347,28 @@ class MainFrame:
         if len(self.file_info) == 0:
             return
 
-        # Determine widget index number
+        # Determine widget row (slot) and index number
         try:
-            index = widget.grid_info()["row"]
+            slot = widget.grid_info()["row"]
         except KeyError:  # Clicked in area near widget that was not a widget
             return
+        index = self.scroll_frame.row_index(slot)
+        if index >= len(self.file_info):  # Placeholder or hidden row
+            return
 
         # Remove index from list if box was unticked
-        if self.check_states[index].get():
-            for position, i in enumerate(self.selected_indices):
-                if index == i:
-                    self.selected_indices.pop(position)
-                    break
+        if self.check_states[slot].get():
+            position = bisect.bisect_left(self.selected_indices, index)
+            if position < len(self.selected_indices) and self.selected_indices[position] == index:
+                self.selected_indices.pop(position)
 
         # Add index to list if box was ticked
         else:
-            self.selected_indices.append(index)
-            self.selected_indices.sort()
+            bisect.insort(self.selected_indices, index)
 
         # Toggle checkbox state if clicked on label
         if isinstance(widget, ttk.Label):
-            self.check_states[index].set(not self.check_states[index].get())
+            self.check_states[slot].set(not self.check_states[slot].get())
 
         self.update_widgets()
 
@@ -371,9 +391,11 @@ class MainFrame:
 
         # Determine widget index number
         try:
-            index = widget.grid_info()["row"]
+            index = self.scroll_frame.row_index(widget.grid_info()["row"])
         except KeyError:  # Clicked in area near widget that was not a widget
             return
+        if index >= len(self.file_info):  # Placeholder or hidden row
+            return
 
         # Check if file is already in page selection dictionary
         if self.file_info[index][2] not in self.selected_pages.keys():
@@ -454,40 +476,78 @@ class MainFrame:
         if len(add_list) == 0:
             return
 
-        # Delete placeholders if needed
+        # Hide placeholders if needed
         if not self.placeholder_deleted:
-            for widget in self.scroll_frame.winfo_children():
-                widget.destroy()
+            for widget in self.placeholders:
+                widget.grid_remove()
             self.placeholder_deleted = True
 
             # Add original file name placeholder text as "hidden" header to preserve width
-            self.scroll_frame.add_header(column=2, text=self.header_str)
+            if len(self.scroll_frame.header_list) == 0:
+                self.scroll_frame.add_header(column=2, text=self.header_str)
 
-        # Update window accordingly
+        # Add file details to main list
         for info in add_list:
             # Add "unique ID" to info (if not preloaded)
             if not preloaded:
                 info = (info[0], info[1], self.next_id)
                 self.next_id += 1
 
-            # Add checkbutton to list
-            self.check_states.append(BooleanVar(value=False))
-            self.checkboxes.append(ttk.Checkbutton(self.scroll_frame, variable=self.check_states[-1]))
-
-            # Add file details to main list
             self.file_info.append(info)
+            self.file_sizes.add(info[2], info[0])
 
-            # Add details to frame
-            row = len(self.file_info) - 1
-            ttk.Label(self.scroll_frame, text=f"{row + 1:> 7}:").grid(row=row, column=0, padx=(5, 1), pady=0.5,
-                                                                      sticky="e")
-            self.checkboxes[-1].grid(row=row, column=1, padx=1, pady=0.5)
-            test = ttk.Label(self.scroll_frame, text=info[1], cursor="hand2")
-            test.grid(row=row, column=2, padx=(1, 5), pady=0.5, sticky="w")
-            Tooltip(test, text=f"Full path: {info[0]}\nRight click to select pages")
+        # Update window accordingly (only rows in view are drawn)
+        self.scroll_frame.set_row_count(len(self.file_info))
 
         self.update_widgets()
 
+    def create_row(self, slot: int) -> list[tkinter.Widget]:
+        """
+        Create the widgets for one row of the virtual file list.
+
+        :param slot: Row number in the scrollable frame
+        :return: List of the row's widgets
+        """
+
+        self.index_labels.append(ttk.Label(self.scroll_frame, text=""))
+        self.index_labels[-1].grid(row=slot, column=0, padx=(5, 1), pady=0.5, sticky="e")
+
+        self.check_states.append(BooleanVar(value=False))
+        self.checkboxes.append(ttk.Checkbutton(self.scroll_frame, variable=self.check_states[-1]))
+        self.checkboxes[-1].grid(row=slot, column=1, padx=1, pady=0.5)
+
+        self.name_labels.append(ttk.Label(self.scroll_frame, text="", cursor="hand2"))
+        self.name_labels[-1].grid(row=slot, column=2, padx=(1, 5), pady=0.5, sticky="w")
+        self.name_tooltips.append(Tooltip(self.name_labels[-1], text=""))
+
+        return [self.index_labels[-1], self.checkboxes[-1], self.name_labels[-1]]
+
+    def fill_row(self, slot: int, index: int) -> None:
+        """
+        Show the details of the file at the given index in a row of the virtual file list.
+
+        :param slot: Row number in the scrollable frame
+        :param index: Index of the file in file_info
+        :return:
+        """
+
+        path, file_name, _ = self.file_info[index]
+        self.index_labels[slot].configure(text=f"{index + 1:> 7}:")
+        self.check_states[slot].set(self.is_selected(index))
+        self.name_labels[slot].configure(text=file_name)
+        self.name_tooltips[slot].tool_text = f"Full path: {path}\nRight click to select pages"
+
+    def is_selected(self, index: int) -> bool:
+        """
+        Check if the file at the given index is selected.
+
+        :param index: Index of the file in file_info
+        :return: True if the index is in selected_indices
+        """
+
+        position = bisect.bisect_left(self.selected_indices, index)
+        return position < len(self.selected_indices) and self.selected_indices[position] == index
+
     def load_files(self) -> None:
         """Load the list of files from the user-specified list. Obtain new file location if needed."""
 
@@ -501,31 +561,10 @@ class MainFrame:
         if load_file == "":  # User did not select file
             return
 
-        # Populate file_info dictionary; ask for revised file locations as necessary
-        with (open(load_file, "r")) as load:
-            lines = load.readlines()
-
-        for line in lines:
-            line = line.strip()
-            dict_include = False  # Flag for whether a dictionary entry should be added to page_selections
-
-            # Separate line into components
-            try:
-                path_name, pages_sel, resort, remove_dup = line.split("\t")
-                dict_include = True
-            except ValueError:  # File did not have page selection details associated with it
-                path_name = line
-                pages_sel = ""
-                resort = ""
-                remove_dup = ""
-
-            # Clean up path name
-            path_name = path_name.replace("\\", "/")
-            file_name = path_name.split("/")[-1]
-
-            if file_name == "":  # Skip blank lines
-                continue
+        # Populate file_info list and page selection dictionary; ask for revised file locations as necessary
+        file_info, selected_pages = read_manifest(load_file, first_id=self.next_id)
 
+        for path_name, file_name, uid in file_info:
             # Ask for revised path if file does not exist
             if not os.path.exists(path_name):
                 revise = messagebox.askyesno(title="File Not Found", message=f"The file \"{file_name}\" was not found. "
@@ -539,17 +578,15 @@ class MainFrame:
                 else:
                     path_name = ""
 
-            # Add info to file info list (if file exists)
+            # Add info to file info list and page selection dictionary (if file exists)
             if path_name != "":
-                self.file_info.append((path_name, file_name, self.next_id))
-                self.next_id += 1
+                self.file_info.append((path_name, file_name, uid))
                 load_count += 1
 
-            # Add details to page selection dictionary (if file exists)
-            if dict_include and path_name != "":
-                resort = True if resort == "True" else False
-                remove_dup = True if remove_dup == "True" else False
-                self.selected_pages.update({self.file_info[-1][2]: (path_name, pages_sel, resort, remove_dup)})
+                if uid in selected_pages.keys():
+                    self.selected_pages.update({uid: (path_name, *selected_pages[uid][1:])})
+
+        self.next_id += len(file_info)
 
         # Add files to window
         self.add_files(mode="multi", preloaded=True)
@@ -568,16 +605,11 @@ class MainFrame:
         :return:
         """
 
-        # Determine if non-sequential index numbers are present
-        non_seq = False
+        if len(self.selected_indices) == 0:
+            return
 
-        for i, index in enumerate(self.selected_indices):
-            try:
-                if self.selected_indices[i + 1] - index > 1:
-                    non_seq = True
-                    break
-            except IndexError:
-                pass
+        # Determine if non-sequential index numbers are present
+        non_seq = self.selected_indices[-1] - self.selected_indices[0] + 1 != len(self.selected_indices)
 
         # Determine whether non-sequential files should be combined
         combine_non_seq = False
@@ -588,99 +620,15 @@ class MainFrame:
                                                   message="Files with non-sequential indices were selected. Should "
                                                           "these files be moved next to each other after moving?")
 
-        # Move to top
-        if move == "top":
-            # Files are sequentially selected (or should be combined)
-            if not non_seq or combine_non_seq:
-                for i, index in enumerate(self.selected_indices):
-                    self.file_info.insert(i, self.file_info[index])
-                    self.file_info.pop(index + 1)
-
-            # Files are not sequential and should not be combined
-            elif non_seq and not combine_non_seq:
-                move = self.selected_indices[0]  # All files should be moved up by this amount
-                for index in self.selected_indices:
-                    move_info = self.file_info[index]
-                    self.file_info.pop(index)
-                    self.file_info.insert(index - move, move_info)
-
-        # Move up
-        elif move == "up":
-            # Files are sequentially selected (or should not be combined)
-            if not non_seq or (non_seq and not combine_non_seq):
-                for i, index in enumerate(self.selected_indices):
-                    if index == 0:
-                        continue
-                    self.file_info.insert(index - 1, self.file_info[index])
-                    self.file_info.pop(index + 1)
-
-            # Files are not sequential and should be combined
-            elif non_seq and combine_non_seq:
-                for i, index in enumerate(self.selected_indices):
-                    if index == 0:
-                        continue
-                    info = self.file_info[index]
-                    self.file_info.pop(index)
-                    self.file_info.insert(i + self.selected_indices[0], info)
-
-        # Move down
-        elif move == "down":
-            max_index = len(self.file_info)
-            # Files are sequentially selected (or should not be combined)
-            if not non_seq or (non_seq and not combine_non_seq):
-                for i, index in enumerate(reversed(self.selected_indices)):
-                    if index == max_index:
-                        continue
-                    info = self.file_info[index]
-                    self.file_info.pop(index)
-                    self.file_info.insert(index + 1, info)
-
-            # Files are not sequential and should be combined
-            elif non_seq and combine_non_seq:
-                for i, index in enumerate(reversed(self.selected_indices)):
-                    if index == max_index:
-                        continue
-                    info = self.file_info[index]
-                    self.file_info.insert(self.selected_indices[-1] + 1 - i, info)
-                    self.file_info.pop(index)
-
-        # Move to bottom
-        elif move == "bottom":
-            # Files are sequentially selected (or should be combined)
-            if not non_seq or combine_non_seq:
-                for i, index in enumerate(reversed(self.selected_indices)):
-                    self.file_info.insert(len(self.file_info) - i, self.file_info[index])
-                    self.file_info.pop(index)
-
-
-            # Files are not sequential and should not be combined
-            elif non_seq and not combine_non_seq:
-                move = len(self.file_info) - self.selected_indices[-1] - 1  # All files should be moved down by this amt
-                for index in reversed(self.selected_indices):
-                    move_info = self.file_info[index]
-                    self.file_info.pop(index)
-                    self.file_info.insert(index + move, move_info)
-
-        # Redraw window
-        #   Delete existing file labels
-        for widget in self.scroll_frame.winfo_children():
-            # Only delete if in column 2 (file name label) and is not header label
-            try:
-                if widget.grid_info()["column"] == 2 and self.header_str not in widget.cget("text"):
-                    widget.destroy()
-            except KeyError:
-                pass
-
-        #   Add new file labels
-        for i, (_, file_name, _) in enumerate(self.file_info):
-            ttk.Label(self.scroll_frame, text=file_name).grid(row=i, column=2, padx=(1, 5), pady=0.5, sticky="w")
-
-        #   Clear all checkboxes
-        for state in self.check_states:
-            state.set(False)
+        # Calculate new positions and reorder the affected part of the list in one pass
+        targets = move_targets(self.selected_indices, len(self.file_info), move, combine_non_seq)
+        start, stop = apply_move(self.file_info, self.selected_indices, targets)
 
-        # Reset selected indices
+        # Reset selected indices and redraw changed rows in view (clears their checkboxes)
+        start = min(start, self.selected_indices[0])
+        stop = max(stop, self.selected_indices[-1] + 1)
         self.selected_indices = []
+        self.scroll_frame.refresh(start, stop)
 
         self.update_widgets()
 
@@ -701,69 +649,35 @@ class MainFrame:
 
             # Clear lists
             self.file_info.clear()
-            self.checkboxes.clear()
-            self.check_states.clear()
+            self.file_sizes.reset()
             self.selected_indices.clear()
 
-            # Delete existing file labels
-            for widget in self.scroll_frame.winfo_children():
-                # Only delete if is not header label
-                if self.header_str not in widget.cget("text"):
-                    widget.destroy()
-
             # Delete page number entries
             self.selected_pages.clear()
 
-        # Delete selected: clear selected files, reduce length of checkbutton lists
+        # Delete selected: keep only the unselected files
         elif mode == "selected":
             confirm = messagebox.askyesno(title="Confirm Deletion", message="Are you sure you want to delete the "
                                                                             "selected files from the list?")
             if not confirm:
                 return
 
-            # Remove selected files
-            for i, index in enumerate(self.selected_indices):
-                self.selected_pages[self.file_info[index - i][2]] = ("", "", True, True)
-                self.file_info.pop(index - i)
-                self.checkboxes[-1].grid_forget()
-                self.checkboxes.pop()
-                self.check_states.pop()
-
-            # Redraw window
-            #   Delete existing file labels
-            for widget in self.scroll_frame.winfo_children():
-                try:
-                    # Only delete if in column 2 (file name label) and is not header label
-                    if widget.grid_info()["column"] == 2 and self.header_str not in widget.cget("text"):
-                        widget.destroy()
-
-                    # Delete unneeded index labels
-                    elif widget.grid_info()["column"] == 0 and widget.grid_info()["row"] >= len(self.file_info):
-                        widget.destroy()
-
-                except KeyError:
-                    pass
-
-            #   Add new file labels
-            for i, (file_path, file_name, _) in enumerate(self.file_info):
-                label = ttk.Label(self.scroll_frame, text=file_name, cursor="hand2")
-                label.grid(row=i, column=2, padx=(1, 5), pady=0.5, sticky="w")
-                Tooltip(label, text=f"Full path: {file_path}\nRight click to select pages")
-
-        #   Clear all checkboxes
-        for state in self.check_states:
-            state.set(False)
+            # Remove selected files (and their page selections) by keeping the unselected files in one pass
+            removed = set(self.selected_indices)
+            for index in self.selected_indices:
+                uid = self.file_info[index][2]
+                self.selected_pages.pop(uid, None)
+                self.file_sizes.remove(uid)
+            self.file_info[:] = [info for i, info in enumerate(self.file_info) if i not in removed]
 
+        # Redraw rows in view with the existing row widgets (clears all checkboxes)
         self.selected_indices.clear()
+        self.scroll_frame.set_row_count(len(self.file_info))
 
-        # Redraw placeholders if no files are in list
+        # Show placeholders if no files are in list
         if len(self.file_info) == 0:
-            ttk.Label(self.scroll_frame, text="      0:", style="Hidden.TLabel").grid(row=0, column=0, padx=(5, 1),
-                                                                                      pady=0.5, sticky="e")
-            blank = ttk.Checkbutton(self.scroll_frame)
-            blank.grid(row=0, column=1, padx=1, pady=0.5)
-            blank.state(["!selected", "!alternate"])
-            ttk.Label(self.scroll_frame, text=self.header_str).grid(row=0, column=2, padx=(1, 5), pady=0.5)
+            for widget in self.placeholders:
+                widget.grid()
 
             self.placeholder_deleted = False
 
@@ -797,16 +711,7 @@ class MainFrame:
         if save_file[-4:] != ".txt":
             save_file += ".txt"
 
-        with open(f"{save_file}", "w+") as file:
-            for path, name, uid in self.file_info:
-                file.write(f"{path}")
-                try:
-                    for i, item in enumerate(self.selected_pages[uid]):
-                        if i != 0:
-                            file.write(f"\t{item}")
-                except KeyError:  # Selected pages window was not launched for this file
-                    pass
-                file.write("\n")
+        write_manifest(save_file, self.file_info, self.selected_pages)
 
         # Ask if program should be terminated
         if prompt:
@@ -862,11 +767,7 @@ class MainFrame:
             self.all_boxes.state(["!selected", "alternate"])
 
         # Update file count label
-        total_size = sum([os.path.getsize(file) for (file, *_) in self.file_info]) / 1024 ** 2
-        if len(self.file_info) == 1:
-            self.file_count.configure(text=f"  1 file selected ({total_size:.1f} MB)")
-        else:
-            self.file_count.configure(text=f"{len(self.file_info): >3} files selected ({total_size:.1f} MB)")
+        self.update_file_count()
 
         # Update placeholder label
         if len(self.file_info) < 10:
@@ -887,6 +788,23 @@ class MainFrame:
         self.win.maxsize(self.win.winfo_reqwidth(), self.win.winfo_screenheight() - 80)
         self.win.geometry(f"{w}x{h}+{x}+{y}")
 
+    def update_file_count(self) -> None:
+        """Update the file count label using the running total of file sizes."""
+
+        total_size = self.file_sizes.total / 1024 ** 2
+        if len(self.file_info) == 1:
+            self.file_count.configure(text=f"  1 file selected ({total_size:.1f} MB)")
+        else:
+            self.file_count.configure(text=f"{len(self.file_info): >3} files selected ({total_size:.1f} MB)")
+
+    def poll_file_sizes(self) -> None:
+        """Apply file sizes checked in the background and update the file count label if the total changed."""
+
+        if self.file_sizes.poll():
+            self.update_file_count()
+
+        self.size_poll = self.win.after(ms=250, func=self.poll_file_sizes)
+
     def toggle_blank_page(self) -> None:
         """Store the current value of the add_blank_page checkbox to the preferences dictionary."""
         self.preferences["Add Blank Page Between Files"] = self.add_blank_page.get()
@@ -896,18 +814,15 @@ class MainFrame:
 
         # Box is selected: Select all boxes
         if "selected" in self.all_boxes.state():
-            for i, state in enumerate(self.check_states):
-                state.set(True)
-                if i not in self.selected_indices:
-                    self.selected_indices.append(i)
-            self.selected_indices.sort()
+            self.selected_indices = list(range(len(self.file_info)))
 
         # Box is not selected: Clear all boxes
         else:
-            for i, state in enumerate(self.check_states):
-                state.set(False)
             self.selected_indices.clear()
 
+        # Redraw rows in view
+        self.scroll_frame.refresh()
+
         self.update_widgets()
 
     #   Calling other frames
@@ -963,6 +878,11 @@ class MainFrame:
         self.selections_frame.grid()
         self.selected_frame.grid()
 
+        # Redraw the list (approved duplicates are removed before the save location is selected) and clear selections
+        self.selected_indices.clear()
+        self.scroll_frame.set_row_count(len(self.file_info))
+        self.update_widgets()
+
         self.win.update_idletasks()
         self.win.minsize(self.min_size[0], self.min_size[1])
         self.win.update_idletasks()
@@ -979,51 +899,21 @@ class MainFrame:
         self.next.focus_set()
 
     # Merger frame methods
-    def generate_page_lists(self) -> None:
+    def replace_missing_file(self, path: str) -> str:
         """
-        Generate list of pages to print, resorting and remove duplicate pages based on user settings.
-        :return:
-        """
-
-        for uid, (path, page_str, resort, remove_dup) in self.selected_pages.items():
-            # Create list of all page numbers
-            page_list = []
-            for item in page_str.split(","):
-                # Single item: append to list
-                if "-" not in item:
-                    try:
-                        page_list.append(int(item))
-                    except ValueError:
-                        pass
-                    continue
-
-                # Multiple items: append all to list
-                min_num, max_num = item.split("-")
-                for i in range(int(min_num), int(max_num) + 1):
-                    page_list.append(i)
-
-            # Remove duplicates if necessary
-            if remove_dup:
-                # Determine indices to remove
-                existing_pages = []
-                del_indices = []
-                for i, pg in enumerate(page_list):
-                    if pg not in existing_pages:
-                        existing_pages.append(pg)
-                        continue
+        Ask if a replacement should be selected for a missing input file.
 
-                    del_indices.append(i)
-
-                # Remove indices
-                for i, index in enumerate(del_indices):
-                    page_list.pop(index - i)
+        :param path: Full path name of the missing file
+        :return: Full path name of the replacement file or an empty string if no replacement was selected
+        """
 
-            # Resort array if necessary
-            if resort:
-                page_list = sorted(page_list)
+        reselect_file = messagebox.askyesno(title="File Not Found", message=f"The file \"{path}\" was not found. Would "
+                                                                            f"you like to select a replacement file?")
+        if reselect_file:
+            set_fd_path(self.preferences["Launch File Dialog to Script Folder"])
+            return get_path_name(".pdf")
 
-            # Post "cleaned" data to new dictionary
-            self.write_pages.update({uid: page_list})
+        return ""
 
     def generate_merger(self) -> None:
         """Check for and remove duplicate files (if needed), get the file save location, then generate the PdfWriter."""
@@ -1034,46 +924,43 @@ class MainFrame:
         self.win.geometry(f"{self.win.winfo_reqwidth()}x{self.win.winfo_reqheight()}+{self.win.winfo_x()}+"
                           f"{self.win.winfo_y()}")
 
-        # Check if duplicate files exist
-        #   Generate list of all files names and indices
-        file_indices = {}
+        # Check if duplicate files (same path or same contents) exist
         dup_file_info = copy.deepcopy(self.file_info)  # Store copy of file_info to be used if user returns to selection
-        for i, (path, *_) in enumerate(self.file_info):
-            if path not in file_indices.keys():
-                file_indices.update({path: [i]})
-            else:
-                file_indices[path].append(i)
-
-        #   Check if any index list has more than one object and delete if necessary
-        cumulative_index = 0  # Tracks deletions across all duplicate instances
-
-        for path, index_list in file_indices.items():
-            if len(index_list) > 1:
-                # Ask user if duplicates should be deleted
-                index_list_inc = [index + 1 for index in index_list]
-                del_dup = messagebox.askyesno(title="Duplicate File", message=f"The file {path} was found at positions "
-                                                                              f"{index_list_inc}. Should the duplicate "
-                                                                              f"files be removed?")
-                if del_dup:
-                    # Ensure user is okay with only the first instance being kept
-                    first_only = messagebox.askyesno(title="First Only", message=f"Only the instance at position "
-                                                                                 f"{index_list_inc[0]} will be kept. "
-                                                                                 f"Continue?")
-
-                    # User does not approve: Return to file selection frame
-                    if not first_only:
-                        messagebox.showerror(title="Fix Duplicates", message="Please remove the undesired instances "
-                                                                             "in the main window.")
-
-                        # Reconfigure window
-                        self.file_info = copy.deepcopy(dup_file_info)
-                        self.return_to_files()
-                        return
+        remove_duplicates = []  # Duplicates the user approved for removal
+
+        duplicates = [(f"The file {path} was found", index_list)
+                      for path, index_list in find_duplicate_paths(self.file_info).items()]
+        if self.preferences["Check Duplicate Contents"]:
+            duplicates += [(f"Files with the same contents as {path} were found", index_list)
+                           for path, index_list in find_duplicate_contents(self.file_info).items()]
+
+        for description, index_list in duplicates:
+            # Ask user if duplicates should be deleted
+            index_list_inc = [index + 1 for index in index_list]
+            del_dup = messagebox.askyesno(title="Duplicate File", message=f"{description} at positions "
+                                                                          f"{index_list_inc}. Should the duplicate "
+                                                                          f"files be removed?")
+            if del_dup:
+                # Ensure user is okay with only the first instance being kept
+                first_only = messagebox.askyesno(title="First Only", message=f"Only the instance at position "
+                                                                             f"{index_list_inc[0]} will be kept. "
+                                                                             f"Continue?")
+
+                # User does not approve: Return to file selection frame
+                if not first_only:
+                    messagebox.showerror(title="Fix Duplicates", message="Please remove the undesired instances "
+                                                                         "in the main window.")
+
+                    # Reconfigure window
+                    self.file_info = copy.deepcopy(dup_file_info)
+                    self.return_to_files()
+                    return
+
+                remove_duplicates.append(index_list)
 
-                    # User approves: Delete duplicate entries
-                    for i, index in enumerate(index_list[1:]):
-                        self.file_info.pop(index - i - cumulative_index)
-                        cumulative_index += 1
+        #   Delete approved duplicate entries
+        remove_duplicate_entries(self.file_info, remove_duplicates)
+        self.file_sizes.reset(self.file_info)
 
         # Get save file location
         if self.save_path == "":  # Only show prompt if save location was not specified previously
@@ -1117,121 +1004,59 @@ class MainFrame:
                 self.save_path = ""
                 continue
 
-        # Update merger label while merger is being built
-        add_dot = True  # Flag for whether dot should be added to or removed from label
+        # Update merger label from the engine's progress events while merger is being built
+        progress_queue = queue.Queue()  # ("assemble", files done, total files, pages, file name, seconds) events
 
         def update_label() -> None:
-            """Add or remove dot from the "Merging" label"""
-            nonlocal add_dot
-
-            # Skip if merging is already completed
-            if str(merger_label.cget("text")) == "Merging Completed.":
-                return
+            """Show files done, pages added, pages per second, time remaining, and the current file."""
+            nonlocal update
 
-            if add_dot:
-                merger_label.configure(text=f"{str(merger_label.cget('text'))}.")
-            else:
-                merger_label.configure(text=f"{str(merger_label.cget('text'))[:-1]}")
+            # Use the latest event only
+            event = None
+            while True:
+                try:
+                    event = progress_queue.get_nowait()
+                except queue.Empty:
+                    break
 
-            if str(merger_label.cget("text"))[-3:] == "..." or str(merger_label.cget("text"))[-3:] == "les":
-                add_dot = not add_dot
+            if event is not None:
+                _, files_done, total_files, pages_added, current_file, elapsed_time = event
 
-            nonlocal update
-            update = merger_label.after(ms=1000, func=update_label)
+                # Estimate remaining time from the fraction of files done
+                if files_done == 0 or elapsed_time <= 0:
+                    remaining = "Calculating"
+                else:
+                    remaining_time = elapsed_time / files_done * (total_files - files_done)
+                    remaining = f"{int(remaining_time // 60):>02.0f}:{round(remaining_time % 60, 0):>02.0f}"
+                page_rate = pages_added / elapsed_time if elapsed_time > 0 else 0
 
-        update = merger_label.after(ms=0, func=update_label)
+                current_file = current_file if len(current_file) <= 30 else f"{current_file[:27]}..."
+                merger_label.configure(text=f"Merging Files: {files_done}/{total_files} files, {pages_added} pages "
+                                            f"({page_rate:.0f} pages/s), Est. Time Remaining: {remaining}  "
+                                            f"{current_file}")
 
-        # Load file into buffer if save file is to be merged
-        save_file_copy = BytesIO()
-        save_orig_size = 0
-        if self.save_path in [full_path for full_path, *_ in self.file_info]:
-            PdfWriter(self.save_path).write(save_file_copy)
-            save_orig_size = os.path.getsize(self.save_path)
-
-        # Delete file to be used for saving PDF (if it exists)
-        if os.path.exists(self.save_path):
-            can_del = False
-            while not can_del:
-                try:
-                    os.remove(self.save_path)
-                    can_del = True
-                except PermissionError:
-                    messagebox.showerror(title="File In Use", message="The selected output file is in use by another "
-                                                                      "application. Please close the file and try "
-                                                                      "again.")
+            update = merger_label.after(ms=250, func=update_label)
 
-        # Clean up pages in page_selection dictionary
-        self.generate_page_lists()
-
-        def merger_generation() -> None:
-            """
-            Generate PdfWriter object and add specified pages of files. Include blank pages between files if selected.
-            :return:
-            """
-            # Check size of blank page
-            if self.add_blank_page.get():
-                blank = PdfWriter()
-                blank.add_blank_page(612, 792)  # 612x792 corresponds to 8.5"x11"
-                blank_page = BytesIO()
-                blank.write(blank_page)
-                self.total_size = len(blank_page.getbuffer())
-                blank_page.close()
-                blank.close()
-
-            # Generate merger
-            self.merger = PdfWriter()
-
-            #   Add files (including blank pages) to merger and determine total size
-            for path_i, name_i, uid_i in self.file_info:
-                if not os.path.exists(path_i) and path_i != self.save_path:
-                    reselect_file = messagebox.askyesno(title="File Not Found", message=f"The file \"{path_i}\" was not"
-                                                                                        f" found. Would you like to "
-                                                                                        f"select a replacement file?")
-                    if reselect_file:
-                        set_fd_path(self.preferences["Launch File Dialog to Script Folder"])
-                        path_i = get_path_name(".pdf")
-
-                # Open file if necessary
-                if path_i == self.save_path:
-                    path_obj = save_file_copy
-                else:
-                    path_obj = open(path_i, "rb")
+        update = merger_label.after(ms=0, func=update_label)
 
-                if path_i != "":  # Will be empty string if file does not exist
-                    # No entry found in write_pages: append entire file
-                    if uid_i not in self.write_pages.keys():
-                        self.merger.append(path_obj)
-                        self.total_size += os.path.getsize(path_i) if path_i != self.save_path else save_orig_size
+        # Set up merge engine
+        self.engine = MergeEngine(self.file_info, self.selected_pages, self.save_path, preferences=self.preferences,
+                                  missing_file_handler=self.replace_missing_file)
 
-                    # Entry found in write_pages: append selected pages
-                    else:
-                        reader = PdfReader(path_obj)
-                        # If all pages were selected, add full file at once
-                        check_str = f"1-{reader.get_num_pages()}"
-                        if self.selected_pages[uid_i][0] == check_str:
-                            self.merger.append(path_obj)
-                            self.total_size += os.path.getsize(path_i) if path_i != self.save_path else save_orig_size
-                            continue
-
-                        # Otherwise, add pages individually
-                        for page in self.write_pages[uid_i]:
-                            self.merger.add_page(reader.pages[page - 1])
-
-                        # Estimate output size by scaling original file size by fraction of pages being printed
-                        total_size = os.path.getsize(path_i) if path_i != self.save_path else save_orig_size
-                        self.total_size += (total_size *
-                                            len(self.write_pages[uid_i]) / reader.get_num_pages())
-
-                    # Append blank page if specified
-                    if self.add_blank_page.get():
-                        self.merger.add_blank_page()
-
-            self.total_size = self.total_size / (1024 ** 2)  # Convert size to MB
-
-        merge = Thread(target=merger_generation, daemon=True)
+        # Generate merger
+        merge = Thread(target=self.engine.build_merger, args=(progress_queue,), daemon=True)
         merge.start()
         merge.join()
 
+        self.total_size = self.engine.total_size
+
+        # Show files that could not be read
+        if len(self.engine.invalid_files) > 0:
+            message = "The following files could not be read and were not merged:\n"
+            for invalid_file, error in self.engine.invalid_files:
+                message += f"{invalid_file} ({error})\n"
+            messagebox.showwarning(title="Skipped Files", message=message)
+
         # Stop merger label from updating
         merger_label.after_cancel(update)
         merger_label.configure(text="Merging Completed.")
@@ -1245,7 +1070,7 @@ class MainFrame:
         size_frame = ttk.Frame(self.merger_frame)
         size_frame.grid(row=1, column=0, padx=5, pady=1, sticky="w")
         ttk.Label(size_frame, text="Size Written:").grid(row=0, column=0, padx=(5, 1), pady=1, sticky="e")
-        written_size = ttk.Label(size_frame, text=f"   0.0/{self.total_size:.1f} MB")
+        written_size = ttk.Label(size_frame, text="   0.0 MB")
         written_size.grid(row=0, column=1, padx=(1, 5), sticky="w")
 
         progress_frame = ttk.Frame(self.merger_frame)
@@ -1269,94 +1094,61 @@ class MainFrame:
         self.win.geometry(f"{self.win.winfo_reqwidth()}x{self.win.winfo_reqheight()}+{self.win.winfo_x()}+"
                           f"{self.win.winfo_y()}")
 
-        last_update_time = datetime.now()
-        first_update = True
+        progress_queue = queue.Queue()  # ("write", bytes, objects, total objects) events from the merge engine
+        start_time = datetime.now()
 
         def update_labels() -> None:
-            """Update time remaining, written size, and progress bar."""
-            nonlocal start_time
-            nonlocal last_update_time
-            nonlocal first_update
-
-            if time_remaining.cget("text") == "00:00":
-                return
-
-            # Get current size of output files
-            try:
-                current_size = os.path.getsize(self.save_path) / (1024 ** 2)  # Convert to MB
-            except FileNotFoundError:
-                current_size = 0.0
-
-            # Estimate remaining conversion time and update label
-            #   Every five seconds, update time remaining based on file size written
-            if (datetime.now() - last_update_time).seconds > 5 or first_update:
-                elapsed_time = (datetime.now() - start_time).seconds
-                remaining_size = self.total_size - current_size
+            """Update time remaining, written size, and progress bar from the latest write progress event."""
+            nonlocal update
 
+            # Use the latest event only
+            event = None
+            while True:
                 try:
-                    remaining_time = elapsed_time / current_size * remaining_size
-                except ZeroDivisionError:
-                    remaining_time = -1
+                    event = progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if event is not None:
+                _, bytes_written, objects_written, total_objects = event
+                progress = min(objects_written / total_objects, 1.0) if total_objects > 0 else 0.0
 
-                if remaining_time > 1:
+                # Estimate remaining time from the fraction of objects written
+                elapsed_time = (datetime.now() - start_time).total_seconds()
+                if progress == 0:
+                    time_remaining.configure(text="Calculating")
+                elif elapsed_time / progress * (1 - progress) > 1:
+                    remaining_time = elapsed_time / progress * (1 - progress)
                     minutes = int(remaining_time // 60)
                     seconds = round(remaining_time % 60, 0)
-
                     time_remaining.configure(text=f"{minutes:>02.0f}:{seconds:>02.0f}")
-
-                elif remaining_time == -1:
-                    time_remaining.configure(text="Calculating")
-
                 else:
                     time_remaining.configure(text="Finishing up")
 
-                last_update_time = datetime.now()
-                first_update = False
-
-            #   Otherwise, just subtract one second
-            else:
-                label_text = time_remaining.cget("text")
-
-                # If something other than time shown, keep that label
-                if label_text == "Calculating":
-                    total_time = -2
-                elif label_text == "Finishing up":
-                    total_time = -1
-                else:
-                    minutes, seconds = label_text.split(":")
-                    total_time = int(minutes) * 60 + int(seconds)
+                # Update amount written label and progress bar
+                written_size.configure(text=f"{bytes_written / (1024 ** 2):> 3.1f} MB ({objects_written}/"
+                                            f"{total_objects} objects)")
+                progress_value.set(int(progress * 100))
+                progress_label.configure(text=f"{progress * 100:.0f}%")
 
-                minutes = total_time // 60
-                seconds = total_time % 60
+            update = time_remaining.after(ms=250, func=update_labels)
 
-                if total_time == -1:
-                    time_remaining.configure(text="Finishing up")
-                elif total_time == -2:
-                    time_remaining.configure(text="Calculating")
-                else:
-                    time_remaining.configure(text=f"{minutes:>02.0f}:{seconds:>02.0f}")
-
-            # Update amount written label
-            written_size.configure(text=f"{current_size:> 3.1f}/{self.total_size:.1f} MB")
-
-            # Update progress bar
-            try:
-                progress_value.set(int(current_size / self.total_size * 100))
-                progress_label.configure(text=f"{current_size / self.total_size * 100:.0f}%")
-            except ZeroDivisionError:
-                progress_value.set(0)
-                progress_label.configure(text="0.0%")
-
-            nonlocal update
-            update = time_remaining.after(ms=1000, func=update_labels)
-
-        start_time = datetime.now()
         update = time_remaining.after(ms=0, func=update_labels)
 
-        # Compress merger (if enabled)
-        if self.preferences["Compress Output"]:
+        # Optimize images, compress merger, and recompress streams (if enabled)
+        if self.preferences["Optimize Images"] and not pillow_available:
+            messagebox.showwarning(title="No Image Optimization",
+                                   message="The \"Pillow\" package was not found, so images will not be optimized. "
+                                           "Install Pillow to use the image optimization function.")
+        if self.preferences["Linearize Output"] and not pikepdf_available:
+            messagebox.showwarning(title="No Linearization",
+                                   message="The \"pikepdf\" package was not found, so the output will not be "
+                                           "linearized. Install pikepdf to use the linearization function.")
+
+        if (self.preferences["Compress Output"] or self.preferences["Recompress Streams"] or
+                self.engine.optimize_images):
             try:
-                self.merger.compress_identical_objects()
+                self.engine.compress_merger()
             except AttributeError:
                 messagebox.showwarning(title="No Compression",
                                        message="The PdfWriter compression function was not available. Output file "
@@ -1365,21 +1157,39 @@ class MainFrame:
 
         # Write output
         self.is_writing = True
+        start_time = datetime.now()
 
         def write_file() -> None:
             can_write = False
             while not can_write:
                 try:
-                    self.merger.write(self.save_path)
+                    self.engine.write(progress_queue)
                     can_write = True
                 except PermissionError:
                     messagebox.showerror(title="File In Use", message="The selected output file is in use by another "
                                                                       "application. Please close the file and try "
                                                                       "again.")
 
+            # Linearize and check the written file (if enabled)
+            if self.engine.linearize:
+                time_remaining.configure(text="Linearizing")
+                try:
+                    self.engine.linearize_output()
+                except OSError as error:
+                    messagebox.showerror(title="Linearization Failed", message=f"The output file was written but could "
+                                                                               f"not be linearized.\n\n{error}")
+                    return
+
+                if not self.engine.linearization_ok:
+                    messagebox.showwarning(title="Linearization Check Failed",
+                                           message=f"The linearized output file did not pass the hint table check. "
+                                                   f"It can still be opened, but fast web view may not work.\n\n"
+                                                   f"{self.engine.linearization_report}")
+
         merger_thread = Thread(target=write_file, daemon=True)
         merger_thread.start()
         merger_thread.join()
+        self.engine.close()  # Delete the spill file and any unfinished streamed output (if used)
 
         # Update window and show completion method
         self.is_writing = False
@@ -1388,19 +1198,37 @@ class MainFrame:
 
         time_remaining.after_cancel(update)
 
-        if self.preferences["Compress Output"]:
-            # Use actual file size rather than self.total_size to account for compression
-            written_size.configure(text=f"{os.path.getsize(self.save_path) / (1024 ** 2):.1f} MB "
-                                        f"({self.total_size - os.path.getsize(self.save_path) / (1024 ** 2):.1f} MB "
-                                        f"saved)")
+        written = os.path.getsize(self.save_path) / (1024 ** 2)
+        if self.preferences["Compress Output"] or self.preferences["Recompress Streams"]:
+            # Compare to self.total_size (the object-based size estimate before compression)
+            written_size.configure(text=f"{written:.1f} MB ({max(self.total_size - written, 0):.1f} MB saved)")
         else:
-            # Use original size
-            written_size.configure(text=f"{self.total_size:.1f} MB")
+            written_size.configure(text=f"{written:.1f} MB")
 
         progress_value.set(100)
         progress_label.configure(text="100%")
         time_remaining.configure(text="Completed.")
 
+        # Show image optimization savings (details for each image in tooltip)
+        if len(self.engine.image_results) > 0:
+            saved = sum(old_size - new_size for *_, old_size, new_size in self.engine.image_results)
+            image_label = ttk.Label(self.merger_frame, text=f"Images Optimized: {len(self.engine.image_results)} "
+                                                            f"({saved / (1024 ** 2):.1f} MB saved)")
+            image_label.grid(row=4, column=0, padx=10, pady=1, sticky="w")
+
+            details = ""
+            for idnum, dpi, old_size, new_size in sorted(self.engine.image_results, key=lambda r: r[3] - r[2])[:20]:
+                details += f"Object {idnum} ({dpi} dpi): {old_size / 1024:.0f} KB to {new_size / 1024:.0f} KB\n"
+            if len(self.engine.image_results) > 20:
+                details += f"{len(self.engine.image_results) - 20} more images"
+            Tooltip(image_label, text=details.strip())
+
+            self.win.update_idletasks()
+            self.win.minsize(self.win.winfo_reqwidth(), self.win.winfo_reqheight())
+            self.win.maxsize(self.win.winfo_reqwidth(), self.win.winfo_reqheight())
+            self.win.geometry(f"{self.win.winfo_reqwidth()}x{self.win.winfo_reqheight()}+{self.win.winfo_x()}+"
+                              f"{self.win.winfo_y()}")
+
         # Activate the "Finish" button
         self.next.focus_set()
 
@@ -1412,13 +1240,16 @@ class MainFrame:
         if self.is_writing:
             confirm = messagebox.askyesno(title="Writing In Progress",
                                           message="The output file is being written. Terminating the program now will "
-                                                  "make the output file unreadable. Are you sure you want to exit?")
+                                                  "cancel the merge (any existing output file is left unchanged). Are "
+                                                  "you sure you want to exit?")
             if not confirm:
                 return
 
-        # Pickle dictionary
+        # Pickle dictionary and save file metadata index
         with (open(self.pref_file, "wb")) as pref:
             pickle.dump(self.preferences, pref)
+        pdf_cache.save_index()
+        self.win.after_cancel(self.size_poll)
 
         # If files list is not empty and the files have not been written, prompt if files should be saved
         if len(self.file_info) > 0 and not self.files_writen:
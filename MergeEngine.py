@@ -0,0 +1,1044 @@
+"""
+Headless merge engine for PDF Combiner.
+
+Contains everything needed to read a saved file list, build the merged PdfWriter, and write the output without
+importing tkinter, so merges can be run on machines without a display. MainFrame drives the same engine from the GUI.
+
+Command line usage (run from the script folder):
+    python -m MergeEngine <saved list (.txt)> <output (.pdf)> [options]
+"""
+
+import argparse
+import os
+import pickle
+import queue
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import BinaryIO, Callable, Optional
+
+from pypdf import PdfWriter, PdfReader
+from pypdf.errors import PyPdfError
+from pypdf.generic import ArrayObject, DictionaryObject, StreamObject
+
+from CompactWriter import can_use_object_streams, compact_object_count, write_compact
+from ImageOptimizer import optimize_images, pillow_available
+from Linearizer import check_linearization, linearize_file, pikepdf_available
+from ObjectIndex import ObjectIndex
+from PagePlan import PagePlan
+from SpillStore import SpillStore, SpilledData
+from StreamCompressor import recompress_streams
+from StreamingWriter import StreamingWriter
+from HandlePool import handle_pool
+from PdfCache import file_metadata, open_mapped, open_pooled, pdf_cache
+
+# Default merge engine preferences (added to the program preferences dictionary in main)
+default_engine_pref = {"Pre-Parse Inputs": False,
+                       "Parse Workers": 0,  # 0 uses one worker per CPU core
+                       "Reader Cache Size (MB)": 512,
+                       "Memory-Map Inputs": True,
+                       "Max Open Files": 256,  # Inputs kept open at once (closed files are reopened when needed)
+                       "Memory Budget (MB)": 0,  # Stream data kept in memory by the merger (0 for no limit)
+                       "Streaming Output": False,
+                       "Tree Merge": False,  # Merge chunks of the file list in worker processes, then combine them
+                       "Files Per Chunk": 100,
+                       "Merge Workers": 0,  # 0 uses one worker process per CPU core
+                       "Check Duplicate Contents": True,
+                       "Deduplicate While Merging": True,
+                       "Recompress Streams": False,
+                       "Compression Level": 6,  # zlib level (1-9) used by "Recompress Streams"
+                       "Compression Threads": 0,  # 0 uses one thread per CPU core
+                       "Optimize Images": False,  # Requires Pillow
+                       "Image Target DPI": 200,
+                       "Image Quality": 75,  # JPEG quality (1-95)
+                       "Image Workers": 0,  # 0 uses one worker process per CPU core
+                       "Object Streams": False,
+                       "Objects Per Stream": 100,
+                       "Linearize Output": False}  # Requires pikepdf
+
+
+def read_manifest(manifest_file: str, first_id: int = 0) -> tuple[list[tuple[str, str, int]],
+                                                                 dict[int, tuple[str, str, bool, bool]]]:
+    """
+    Read a saved file list (one file per line, with optional tab-separated page selection details).
+
+    Missing files are kept in the returned list so the caller can decide how to handle them.
+
+    :param manifest_file: Path name of the saved file list
+    :param first_id: Unique ID to assign to the first file in the list
+    :return: Tuple of the file_info list of (full path, file name, unique ID) tuples and the selected_pages dictionary
+    """
+
+    file_info = []
+    selected_pages = {}
+    next_id = first_id
+
+    with (open(manifest_file, "r")) as load:
+        lines = load.readlines()
+
+    for line in lines:
+        line = line.strip()
+
+        # Separate line into components
+        try:
+            path_name, pages_sel, resort, remove_dup = line.split("\t")
+            dict_include = True
+        except ValueError:  # File did not have page selection details associated with it
+            path_name = line
+            pages_sel = ""
+            resort = ""
+            remove_dup = ""
+            dict_include = False
+
+        # Clean up path name
+        path_name = path_name.replace("\\", "/")
+        file_name = path_name.split("/")[-1]
+
+        if file_name == "":  # Skip blank lines
+            continue
+
+        file_info.append((path_name, file_name, next_id))
+        if dict_include:
+            selected_pages.update({next_id: (path_name, pages_sel, resort == "True", remove_dup == "True")})
+        next_id += 1
+
+    return file_info, selected_pages
+
+
+def write_manifest(manifest_file: str, file_info: list[tuple[str, str, int]],
+                   selected_pages: dict[int, tuple[str, str, bool, bool]]) -> None:
+    """
+    Save the list of full path names (and page selection details, if any) as a tab-separated text file.
+
+    :param manifest_file: Path name of the file to write
+    :param file_info: List of (full path, file name, unique ID) tuples
+    :param selected_pages: Dictionary of page selections keyed by unique ID
+    :return:
+    """
+
+    with open(f"{manifest_file}", "w+") as file:
+        for path, name, uid in file_info:
+            file.write(f"{path}")
+            try:
+                for i, item in enumerate(selected_pages[uid]):
+                    if i != 0:
+                        file.write(f"\t{item}")
+            except KeyError:  # Selected pages window was not launched for this file
+                pass
+            file.write("\n")
+
+
+def generate_page_plans(selected_pages: dict[int, tuple[str, str, bool, bool]]) -> dict[int, PagePlan]:
+    """
+    Generate the plan of pages to print, resorting and removing duplicate pages based on user settings.
+
+    :param selected_pages: Dictionary of page selections keyed by unique ID
+    :return: Dictionary of "cleaned" PagePlans keyed by unique ID
+    """
+
+    return {uid: PagePlan.from_string(page_str, resort=resort, remove_dup=remove_dup)
+            for uid, (path, page_str, resort, remove_dup) in selected_pages.items()}
+
+
+def find_duplicate_paths(file_info: list[tuple[str, str, int]]) -> dict[str, list[int]]:
+    """
+    Find files that appear more than once in the list.
+
+    :param file_info: List of (full path, file name, unique ID) tuples
+    :return: Dictionary of list indices keyed by full path for every path found at more than one position
+    """
+
+    file_indices = {}
+    for i, (path, *_) in enumerate(file_info):
+        if path not in file_indices.keys():
+            file_indices.update({path: [i]})
+        else:
+            file_indices[path].append(i)
+
+    return {path: index_list for path, index_list in file_indices.items() if len(index_list) > 1}
+
+
+def find_duplicate_contents(file_info: list[tuple[str, str, int]],
+                            max_workers: Optional[int] = None) -> dict[str, list[int]]:
+    """
+    Find different paths with identical contents (e.g. the same file copied into two folders).
+
+    Files are grouped by size first, so only files sharing a size are hashed (on a thread pool). Hashes are kept by the
+    PdfCache and saved in the metadata index. Files that cannot be accessed are ignored.
+
+    :param file_info: List of (full path, file name, unique ID) tuples
+    :param max_workers: Maximum number of hashing threads (defaults to the ThreadPoolExecutor default)
+    :return: Dictionary of list indices (of every instance of every matching path) keyed by the first matching path
+    """
+
+    # List indices keyed by unique path
+    path_indices = {}
+    for i, (path, *_) in enumerate(file_info):
+        path_indices.setdefault(path, []).append(i)
+
+    # Group paths by size
+    size_groups = {}
+    for path in path_indices.keys():
+        try:
+            size_groups.setdefault(os.path.getsize(path), []).append(path)
+        except OSError:
+            pass
+    candidates = [path for paths in size_groups.values() if len(paths) > 1 for path in paths]
+    if len(candidates) == 0:
+        return {}
+
+    # Hash candidates and group by hash
+    def content_hash(path: str) -> str:
+        try:
+            return pdf_cache.get_content_hash(path)
+        except OSError:
+            return ""
+
+    hash_groups = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, digest in zip(candidates, executor.map(content_hash, candidates)):
+            if digest:
+                hash_groups.setdefault(digest, []).append(path)
+
+    duplicates = {}
+    for paths in hash_groups.values():
+        if len(paths) > 1:
+            paths.sort(key=lambda group_path: path_indices[group_path][0])
+            duplicates.update({paths[0]: sorted(i for group_path in paths for i in path_indices[group_path])})
+
+    return duplicates
+
+
+def remove_duplicate_entries(file_info: list[tuple[str, str, int]], duplicates: list[list[int]]) -> None:
+    """
+    Remove all but the first instance of each duplicated file from file_info (in place).
+
+    :param file_info: List of (full path, file name, unique ID) tuples
+    :param duplicates: List of duplicate index lists (values returned by find_duplicate_paths or
+        find_duplicate_contents)
+    :return:
+    """
+
+    del_indices = set()
+    for index_list in duplicates:
+        del_indices.update(index_list[1:])
+
+    file_info[:] = [info for i, info in enumerate(file_info) if i not in del_indices]
+
+
+class CountingStream:
+    """
+    Binary output stream wrapper that counts the bytes and objects written and reports them to a queue.
+
+    Progress events are ("write", bytes written, objects written, total objects) tuples, sent at most once per interval
+    so the queue stays short. pypdf writes each "endobj" marker separately, which is used to count objects.
+    """
+
+    def __init__(self, stream: Optional[BinaryIO], progress: Optional[queue.Queue] = None, total_objects: int = 0,
+                 interval: float = 0.1) -> None:
+        """
+        Wrap an open binary stream.
+
+        :param stream: Stream to write to (None to only count the bytes, e.g. to measure objects)
+        :param progress: Queue to send progress events to (None to only count)
+        :param total_objects: Number of objects that will be written
+        :param interval: Minimum time (seconds) between progress events
+        """
+
+        self.stream = stream
+        self.progress = progress
+        self.total_objects = total_objects
+        self.interval = interval
+        self.bytes_written = 0
+        self.objects_written = 0
+        self.last_report = 0.0
+
+    def write(self, data: bytes) -> int:
+        """
+        Write data to the wrapped stream and send a progress event if one is due.
+
+        :param data: Bytes to write
+        :return: Number of bytes written
+        """
+
+        if self.stream is not None:
+            self.stream.write(data)
+        self.bytes_written += len(data)
+        if data == b"\nendobj\n":
+            self.objects_written += 1
+            if time.monotonic() - self.last_report >= self.interval:
+                self.report()
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self.stream.tell() if self.stream is not None else self.bytes_written
+
+    def flush(self) -> None:
+        if self.stream is not None:
+            self.stream.flush()
+
+    def report(self) -> None:
+        """Send the current counts to the progress queue."""
+
+        self.last_report = time.monotonic()
+        if self.progress is not None:
+            self.progress.put(("write", self.bytes_written, self.objects_written, self.total_objects))
+
+
+def estimate_output_size(writer: PdfWriter) -> int:
+    """
+    Estimate the written size of a PdfWriter from the lengths of its stream data.
+
+    The writer only holds the objects reachable from the pages added to it, and each shared object (e.g. a font used by
+    every page of a file) is held once, so summing the objects counts shared resources once. Only the stored length of
+    each stream's data is read; dictionaries and arrays are estimated from their entry counts instead of being
+    serialized, so the estimate costs one pass over the object list.
+
+    :param writer: Assembled PdfWriter
+    :return: Estimated output size in bytes
+    """
+
+    # Approximate written sizes: "n 0 obj" and "endobj" lines, one "/Key value" dictionary entry or one array item,
+    # and the "stream" and "endstream" keywords
+    size = 0
+    for obj in writer._objects:
+        if obj is None:
+            continue
+        size += 20
+        if isinstance(obj, SpilledData):  # Not read back from the spill file
+            size += obj.spill_length + 18 * len(obj) + 18
+        elif isinstance(obj, StreamObject):
+            size += len(obj._data) + 18 * len(obj) + 18
+        elif isinstance(obj, DictionaryObject):
+            size += 18 * len(obj)
+        elif isinstance(obj, ArrayObject):
+            size += 8 * len(obj)
+        else:
+            size += 16
+
+    # Add the header, one 20-byte cross-reference entry per object, and the trailer
+    return size + 20 * (len(writer._objects) + 1) + 128
+
+
+def merge_chunk(file_info: list[tuple[str, str, int]], selected_pages: dict[int, tuple[str, str, bool, bool]],
+                save_path: str, preferences: dict) -> dict:
+    """
+    Merge one chunk of a tree merge into an intermediate file. Run in a worker process by MergeEngine.
+
+    :param file_info: List of (full path, file name, unique ID) tuples in the chunk
+    :param selected_pages: Dictionary of page selections of the chunk's files keyed by unique ID
+    :param save_path: Full path name of the intermediate file
+    :param preferences: Preferences for the chunk's merge engine
+    :return: Dictionary of the pages added, skipped and invalid files, recompression counts, identical objects removed
+        and bytes saved, and the metadata of the files read
+    """
+
+    pdf_cache.index_file = ""  # Only the main process saves the metadata index
+    handle_pool.close_all()  # Files opened by the main process before the worker started are not shared
+
+    engine = MergeEngine(file_info, selected_pages, save_path, preferences=preferences)
+    try:
+        engine.run()
+    finally:
+        engine.close()
+
+    return {"pages": engine.pages_added, "skipped": engine.skipped_files, "invalid": engine.invalid_files,
+            "recompressed": engine.recompressed_streams, "recompress_saved": engine.recompress_saved,
+            "dedup_removed": engine.object_index.objects_removed if engine.object_index is not None else 0,
+            "dedup_saved": engine.object_index.bytes_saved if engine.object_index is not None else 0,
+            "metadata": [pdf_cache.get_metadata(path) for path, *_ in file_info if os.path.exists(path)]}
+
+
+class MergeEngine:
+    """Build and write a merged PDF from a file list without any user interface."""
+
+    def __init__(self, file_info: list[tuple[str, str, int]], selected_pages: dict[int, tuple[str, str, bool, bool]],
+                 save_path: str, preferences: Optional[dict] = None,
+                 missing_file_handler: Optional[Callable[[str], str]] = None) -> None:
+        """
+        Store the merge settings.
+
+        Preferences not found in the dictionary use the default_engine_pref values. A blank page is added between files
+        and identical objects are compressed unless disabled in the preferences.
+
+        :param file_info: List of (full path, file name, unique ID) tuples in output order
+        :param selected_pages: Dictionary of page selections keyed by unique ID
+        :param save_path: Full path name of the output file
+        :param preferences: Dictionary of program preferences
+        :param missing_file_handler: Called with the path of a missing input; returns a replacement path or an empty
+            string to skip the file. Missing files are skipped if not specified.
+        """
+
+        # Passed parameters
+        self.file_info = file_info
+        self.selected_pages = selected_pages
+        self.save_path = save_path
+        self.preferences = {**default_engine_pref, **(preferences if preferences is not None else {})}
+        self.add_blank_page = self.preferences.get("Add Blank Page Between Files", True)
+        self.compress = self.preferences.get("Compress Output", True)
+        self.recompress = self.preferences["Recompress Streams"]
+        self.optimize_images = self.preferences["Optimize Images"] and pillow_available
+        self.object_streams = self.preferences["Object Streams"]
+        self.streaming = self.preferences["Streaming Output"]
+        self.tree_merge = self.preferences["Tree Merge"]
+        self.linearize = self.preferences["Linearize Output"] and pikepdf_available
+        self.missing_file_handler = missing_file_handler
+        pdf_cache.set_memory_budget(int(self.preferences["Reader Cache Size (MB)"]) * 1024 ** 2)
+        handle_pool.set_limits(int(self.preferences["Max Open Files"]), self.preferences["Memory-Map Inputs"])
+
+        # Other parameters
+        self.write_pages = {}  # Stores "cleaned" info from the selected_pages dictionary
+        self.merger = None
+        self.total_size = 0  # Estimated output size before compression (MB once build_merger is complete)
+        self.skipped_files = []  # Inputs that could not be found and were not replaced
+        self.invalid_files = []  # (file name, error message) tuples for inputs that failed the pre-parse stage
+        self.image_results = []  # (object number, estimated DPI, original bytes, new bytes) tuples for replaced images
+        self.recompressed_streams = 0  # Streams replaced by compress_merger's recompression stage
+        self.recompress_saved = 0  # Bytes saved by the recompression stage
+        self.linearization_ok = False  # Result of the linearization check (if linearization is enabled)
+        self.linearization_report = ""  # Problems found by the linearization check
+        self.streaming_writer = None  # StreamingWriter writing streams while files are added (if streaming is enabled)
+        self.output_file = None  # Temporary output file written by the StreamingWriter
+        self.chunk_dir = None  # Temporary folder holding the intermediate files of a tree merge
+        self.tree_merged = False  # Flag for whether the merger was built from intermediate files
+        self.spill_store = None  # SpillStore holding stream data over the memory budget (if a budget is set)
+        self.object_index = None  # ObjectIndex used to remove identical objects as files are added (if enabled)
+        self.progress = None  # Queue for assembly progress events (set by build_merger)
+        self.files_done = 0  # Inputs processed by build_merger (merged, skipped, or invalid)
+        self.pages_added = 0  # Pages added to the merger by build_merger (excluding blank pages)
+        self.assemble_start = 0.0
+        self.last_report = 0.0
+
+    def start_pre_parse(self) -> tuple[Optional[ProcessPoolExecutor], dict[str, Future]]:
+        """
+        Submit every existing input to a pool of worker processes to be opened, validated, and indexed. This is a
+        validation and metadata-warming step, not a speed-up, so it is off by default ("Pre-Parse Inputs").
+
+        Workers are limited by the "Parse Workers" preference (0 uses one per CPU core). Files with up-to-date metadata
+        in the PdfCache are not submitted. Results are collected by build_merger in list order, so assembly starts as
+        soon as the first file is ready.
+
+        Readers cannot be passed between processes, so the main process still parses every file to copy its pages; the
+        workers only fill the metadata index and report invalid files early, saving at most the page count and page
+        size scan (about 10% of assembly for small files). The stage is skipped on single-core machines, where the
+        workers would compete with assembly. Content hashes are left to find_duplicate_contents, which only hashes files
+        that share a size.
+
+        :return: Tuple of the executor (None if the stage is disabled) and the futures keyed by full path
+        """
+
+        if not self.preferences["Pre-Parse Inputs"] or (os.cpu_count() or 1) < 2:
+            return None, {}
+
+        # Unique, existing paths in list order
+        paths = list(dict.fromkeys(path for path, *_ in self.file_info
+                                   if os.path.exists(path) and not pdf_cache.has_metadata(path)))
+        if len(paths) < 2:  # Not worth starting worker processes
+            return None, {}
+
+        max_workers = int(self.preferences["Parse Workers"]) or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=min(max_workers, len(paths)))
+        open_reader = open_mapped if self.preferences["Memory-Map Inputs"] else PdfReader
+        return executor, {path: executor.submit(file_metadata, path, open_reader) for path in paths}
+
+    def build_merger(self, progress: Optional[queue.Queue] = None) -> PdfWriter:
+        """
+        Generate PdfWriter object and add specified pages of files. Include blank pages between files if selected.
+
+        :param progress: Queue to send ("assemble", files done, total files, pages added, current file name, elapsed
+            seconds) events to while files are added
+        :return: The assembled PdfWriter
+        """
+
+        # Clean up pages in page_selection dictionary
+        self.write_pages = generate_page_plans(self.selected_pages)
+
+        # Generate merger
+        self.merger = PdfWriter()
+        if self.compress and self.preferences["Deduplicate While Merging"]:
+            self.object_index = ObjectIndex(self.merger)
+        memory_budget = int(self.preferences["Memory Budget (MB)"]) * 1024 ** 2
+        if memory_budget > 0:
+            self.spill_store = SpillStore(memory_budget, directory=os.path.dirname(os.path.abspath(self.save_path)))
+        if self.streaming:
+            self.output_file = open(f"{self.save_path}.tmp", "wb")
+            self.streaming_writer = StreamingWriter(self.merger, CountingStream(self.output_file))
+        self.progress = progress
+        self.files_done = 0
+        self.pages_added = 0
+        self.assemble_start = time.monotonic()
+        executor = None
+
+        try:
+            if self.tree_merge and len(self.file_info) > max(1, int(self.preferences["Files Per Chunk"])):
+                self._assemble_chunks()
+            else:
+                executor, parsed = self.start_pre_parse()
+                self._assemble(parsed)
+        except BaseException:
+            self.close()  # Remove the partly streamed output (if any)
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self.report_assembly("", force=True)
+
+        # Estimate size before compression (including identical objects already removed and streams already written)
+        self.total_size = estimate_output_size(self.merger)
+        if self.streaming_writer is not None:
+            self.total_size += self.streaming_writer.stream.bytes_written
+        if self.object_index is not None:
+            self.total_size += self.object_index.bytes_saved
+        self.total_size = self.total_size / (1024 ** 2)  # Convert size to MB
+        pdf_cache.save_index()
+
+        return self.merger
+
+    def _assemble(self, parsed: dict[str, Future]) -> None:
+        """
+        Add files (including blank pages) to merger.
+
+        :param parsed: Pre-parse stage results keyed by full path
+        :return:
+        """
+
+        for path_i, name_i, uid_i in self.file_info:
+            self.report_assembly(name_i)
+            self.files_done += 1
+
+            if not os.path.exists(path_i):
+                path_i = self.missing_file_handler(path_i) if self.missing_file_handler is not None else ""
+
+            if path_i == "":  # Will be empty string if file does not exist
+                self.skipped_files.append(name_i)
+                continue
+
+            # Wait for pre-parse stage result (if submitted)
+            if path_i in parsed.keys():
+                pdf_cache.store_metadata(parsed[path_i].result())
+
+            # Get reader and metadata from the shared cache (an existing output file is read like any other input; it
+            # is only replaced once the new output has been written)
+            info = pdf_cache.get_metadata(path_i)
+            reader = pdf_cache.get_reader(path_i) if not info["error"] else None
+
+            # Skip files that could not be parsed
+            if info["error"]:
+                self.invalid_files.append((name_i, info["error"]))
+                continue
+
+            # No entry found in write_pages or every page is selected in order (in any notation): append entire file
+            if uid_i not in self.write_pages.keys() or self.write_pages[uid_i].covers_all(info["pages"]):
+                self.merger.append(reader)
+                self.pages_added += info["pages"]
+
+            # Otherwise, add each run of consecutive pages as one range (single pages too, so links and annotations are
+            # handled the same way for every run)
+            else:
+                for first, last in self.write_pages[uid_i].runs():
+                    self.merger.append(reader, pages=(first - 1, last), import_outline=False)
+                    self.pages_added += last - first + 1
+                    self.report_assembly(name_i)
+
+            self._finish_file(reader, path_i, name_i)
+
+            # Append blank page if specified
+            if self.add_blank_page:
+                self.merger.add_blank_page()
+
+    def _assemble_chunks(self) -> None:
+        """
+        Split the file list into chunks and merge each chunk into an intermediate file in a worker process, then add the
+        intermediate files to the merger in list order.
+
+        Each chunk is merged by a MergeEngine with the same page selections and blank page setting (a blank page follows
+        every file, including the last file of a chunk), so the merger gets the same pages in the same order as with
+        _assemble. Streams are recompressed (if enabled) by the workers, and the combined merger copies the
+        intermediate files' stream data without decoding it. Missing files are replaced or skipped before the workers
+        start.
+
+        :return:
+        """
+
+        # Replace or skip missing files
+        files = []
+        for path_i, name_i, uid_i in self.file_info:
+            if not os.path.exists(path_i):
+                self.report_assembly(name_i)
+                path_i = self.missing_file_handler(path_i) if self.missing_file_handler is not None else ""
+            if path_i == "":
+                self.skipped_files.append(name_i)
+                self.files_done += 1
+            else:
+                files.append((path_i, name_i, uid_i))
+
+        files_per_chunk = max(1, int(self.preferences["Files Per Chunk"]))
+        chunks = [files[i:i + files_per_chunk] for i in range(0, len(files), files_per_chunk)]
+        if len(chunks) == 0:
+            return
+
+        # Worker engines leave image optimization, output modes, and linearization to the combined merger, and share
+        # the memory budget
+        max_workers = min(int(self.preferences["Merge Workers"]) or os.cpu_count() or 1, len(chunks))
+        memory_budget = int(self.preferences["Memory Budget (MB)"])
+        chunk_pref = {**self.preferences, "Tree Merge": False, "Pre-Parse Inputs": False, "Streaming Output": False,
+                      "Optimize Images": False, "Object Streams": False, "Linearize Output": False,
+                      "Compression Threads": 1,
+                      "Memory Budget (MB)": max(1, memory_budget // max_workers) if memory_budget > 0 else 0}
+
+        self.chunk_dir = tempfile.mkdtemp(prefix="PDF Combiner ", dir=os.path.dirname(os.path.abspath(self.save_path)))
+        chunk_paths = [os.path.join(self.chunk_dir, f"Chunk {i + 1}.pdf") for i in range(len(chunks))]
+
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [executor.submit(merge_chunk, chunk, {uid: self.selected_pages[uid] for *_, uid in chunk
+                                                            if uid in self.selected_pages.keys()},
+                                       chunk_path, chunk_pref)
+                       for chunk, chunk_path in zip(chunks, chunk_paths)]
+
+            for i, (chunk, chunk_path, future) in enumerate(zip(chunks, chunk_paths, futures)):
+                label = f"Chunk {i + 1} ({chunk[0][1]} to {chunk[-1][1]})"
+                self.report_assembly(label)
+                result = future.result()
+
+                self.skipped_files.extend(result["skipped"])
+                self.invalid_files.extend(result["invalid"])
+                self.recompressed_streams += result["recompressed"]
+                self.recompress_saved += result["recompress_saved"]
+                for info in result["metadata"]:
+                    pdf_cache.store_metadata(info)
+
+                reader = open_pooled(chunk_path)
+                self.merger.append(reader)
+                self.pages_added += result["pages"]
+                self.files_done += len(chunk)
+                self.tree_merged = True
+                self._finish_file(reader, chunk_path, label)
+                self.report_assembly(label)
+
+                # Identical objects are reported per chunk: those removed within the chunk by the worker plus those
+                # shared with earlier chunks
+                if self.object_index is not None:
+                    _, removed, saved = self.object_index.stats[-1]
+                    self.object_index.stats[-1] = (label, removed + result["dedup_removed"],
+                                                   saved + result["dedup_saved"])
+                    self.object_index.objects_removed += result["dedup_removed"]
+                    self.object_index.bytes_saved += result["dedup_saved"]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish_file(self, reader: PdfReader, path: str, name: str) -> None:
+        """
+        Process the objects added to the merger by one file: remove identical objects, write streams (streaming output),
+        move stream data to disk (memory budget), and release the file's reader.
+
+        :param reader: Reader of the file just added
+        :param path: Full path name of the file
+        :param name: File name (used for the identical object stats)
+        :return:
+        """
+
+        # Remove objects identical to those of earlier files
+        if self.object_index is not None:
+            self.object_index.deduplicate(reader, name)
+
+        # Streaming output: recompress (if enabled and not already done by tree merge workers) and write the new streams
+        if self.streaming_writer is not None:
+            if self.recompress and not self.tree_merged:
+                replaced, saved = recompress_streams(self.merger, level=int(self.preferences["Compression Level"]),
+                                                     max_workers=int(self.preferences["Compression Threads"]),
+                                                     first_index=self.streaming_writer.flushed)
+                self.recompressed_streams += replaced
+                self.recompress_saved += saved
+            self.streaming_writer.flush()
+
+        # Move stream data to disk if the memory budget is exceeded
+        if self.spill_store is not None:
+            self.spill_store.track(self.merger)
+
+        # Release the reader's parsed objects (which share their stream data with the copies in the merger) and its
+        # file's mapped pages, since pypdf keeps every reader used by the merger
+        if self.spill_store is not None or self.streaming_writer is not None:
+            reader.resolved_objects.clear()
+            handle_pool.close_path(path)
+
+    def report_assembly(self, current_file: str, force: bool = False, interval: float = 0.1) -> None:
+        """
+        Send an assembly progress event if a queue was given and one is due.
+
+        :param current_file: Name of the file being added
+        :param force: Flag for whether the event should be sent regardless of the interval
+        :param interval: Minimum time (seconds) between progress events
+        :return:
+        """
+
+        if self.progress is None or (not force and time.monotonic() - self.last_report < interval):
+            return
+
+        self.last_report = time.monotonic()
+        self.progress.put(("assemble", self.files_done, len(self.file_info), self.pages_added, current_file,
+                           self.last_report - self.assemble_start))
+
+    def compress_merger(self) -> None:
+        """
+        Downsample images (if enabled and Pillow is installed), compress identical objects in the merger (if enabled and
+        not already done while files were added), then recompress streams (if enabled). Replaced streams are spilled to
+        disk if the memory budget is exceeded.
+
+        Streams of a tree merge were already recompressed (if enabled) by the workers. Nothing is done for streaming
+        output: streams were recompressed (if enabled) before they were written, and images and identical objects cannot
+        be changed once written.
+
+        :raises AttributeError: PdfWriter compression is not available in the installed pypdf version
+        """
+
+        if self.streaming_writer is not None:
+            return
+
+        if self.optimize_images:
+            self.image_results = optimize_images(self.merger, target_dpi=int(self.preferences["Image Target DPI"]),
+                                                 quality=int(self.preferences["Image Quality"]),
+                                                 max_workers=int(self.preferences["Image Workers"]))
+
+        if self.compress and self.object_index is None:
+            self.merger.compress_identical_objects()
+
+        if self.recompress and not self.tree_merged:  # Done by the workers for a tree merge
+            # With a memory budget, compress one budget of data at a time and spill the results
+            self.recompressed_streams, self.recompress_saved = recompress_streams(
+                self.merger, level=int(self.preferences["Compression Level"]),
+                max_workers=int(self.preferences["Compression Threads"]),
+                batch_bytes=self.spill_store.memory_budget if self.spill_store is not None else 0,
+                after_batch=(lambda: self.spill_store.rescan(self.merger)) if self.spill_store is not None else None)
+
+        # Count replaced streams against the memory budget
+        if self.spill_store is not None:
+            self.spill_store.rescan(self.merger)
+
+    def write_stream(self, stream: BinaryIO, progress: Optional[queue.Queue] = None,
+                     object_streams: Optional[bool] = None) -> None:
+        """
+        Write the merger to a binary stream through a CountingStream.
+
+        :param stream: Binary output stream
+        :param progress: Queue to send ("write", bytes written, objects written, total objects) events to
+        :param object_streams: Flag for whether to pack objects into object streams with a cross-reference stream (uses
+            the "Object Streams" preference if not specified; ignored for encrypted output)
+        """
+
+        if object_streams is None:
+            object_streams = self.object_streams
+        object_streams = object_streams and can_use_object_streams(self.merger)
+        per_stream = max(1, int(self.preferences["Objects Per Stream"]))
+
+        if object_streams:
+            total_objects = compact_object_count(self.merger, per_stream)
+        else:
+            total_objects = sum(1 for obj in self.merger._objects if obj is not None)
+
+        counting_stream = CountingStream(stream, progress, total_objects)
+        if object_streams:
+            write_compact(self.merger, counting_stream, objects_per_stream=per_stream,
+                          level=int(self.preferences["Compression Level"]))
+        else:
+            self.merger.write(counting_stream)
+        counting_stream.report()  # Final counts
+
+    def write(self, progress: Optional[queue.Queue] = None) -> None:
+        """
+        Write the merger to a temporary file next to the output file, then replace the output file with it. For
+        streaming output, the rest of the temporary file (already holding the streams) is written instead.
+
+        The output file (which may also be one of the inputs) is left unchanged if writing fails.
+
+        :param progress: Queue to send ("write", bytes written, objects written, total objects) events to
+        :raises PermissionError: The output file is in use by another application
+        """
+
+        temp_path = f"{self.save_path}.tmp"
+        try:
+            if self.streaming_writer is not None:
+                self.finish_streaming(progress)
+            else:
+                with open(temp_path, "wb") as file:
+                    self.write_stream(file, progress)
+            pdf_cache.release(self.save_path)  # The output file may be mapped if it is also an input
+            os.replace(temp_path, self.save_path)
+        except PermissionError:
+            # Streamed output cannot be written again, so it is kept for another attempt if the output file is in use
+            if self.streaming_writer is None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        except BaseException:
+            if self.streaming_writer is not None:
+                self.close()
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def finish_streaming(self, progress: Optional[queue.Queue] = None) -> None:
+        """
+        Write the objects the StreamingWriter has not written yet, the cross-reference table, and the trailer, then
+        close the temporary output file. Does nothing if already finished.
+
+        :param progress: Queue to send ("write", bytes written, objects written, total objects) events to
+        """
+
+        if self.streaming_writer.finished:
+            return
+
+        counting_stream = self.streaming_writer.stream
+        counting_stream.progress = progress
+        counting_stream.total_objects = self.streaming_writer.total_objects()
+        self.streaming_writer.finish()
+        counting_stream.report()  # Final counts
+        self.output_file.close()
+
+    def linearize_output(self) -> None:
+        """
+        Linearize the written output file (if enabled and pikepdf is installed), then check its hint tables.
+
+        :raises OSError: The output file could not be linearized
+        """
+
+        if not self.linearize:
+            return
+
+        linearize_file(self.save_path)
+        self.linearization_ok, self.linearization_report = check_linearization(self.save_path)
+
+    def benchmark_output(self) -> list[tuple[str, int, float, float]]:
+        """
+        Write the merger in memory with and without object streams, then time opening each result.
+
+        The open time covers parsing the cross-reference data, counting pages, and reading the first page's contents.
+
+        :return: List of (output mode, size in bytes, write seconds, open seconds) tuples
+        """
+
+        results = []
+        for mode, object_streams in [("Standard xref table", False), ("Object streams", True)]:
+            buffer = BytesIO()
+            start = time.perf_counter()
+            self.write_stream(buffer, object_streams=object_streams)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reader = PdfReader(buffer)
+            if len(reader.pages) > 0:
+                reader.pages[0].get_contents()
+            open_time = time.perf_counter() - start
+
+            results.append((mode, len(buffer.getbuffer()), write_time, open_time))
+
+        return results
+
+    def close(self) -> None:
+        """
+        Delete the temporary spill file (if used), the streamed output file (if not written to the output file), and
+        the intermediate files of a tree merge. The merger can no longer be written afterwards.
+        """
+
+        if self.spill_store is not None:
+            self.spill_store.close()
+        if self.output_file is not None:
+            self.output_file.close()
+            if os.path.exists(self.output_file.name):
+                os.remove(self.output_file.name)
+        if self.chunk_dir is not None:
+            for file_name in os.listdir(self.chunk_dir):
+                handle_pool.close_path(os.path.join(self.chunk_dir, file_name))
+            shutil.rmtree(self.chunk_dir, ignore_errors=True)  # Workers cancelled by a failure may still be writing
+            self.chunk_dir = None
+
+    def run(self) -> None:
+        """Run the full merge (build, compress, write, and linearize) without any prompts."""
+
+        self.build_merger()
+        self.compress_merger()
+        self.write()
+        self.linearize_output()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point; merge the files in a saved list into a single PDF.
+
+    :param argv: Command line arguments (defaults to sys.argv)
+    :return: Exit code
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m MergeEngine",
+                                     description="Merge the PDF files in a saved PDF Combiner list.")
+    parser.add_argument("manifest", help="Saved file list (.txt) as written by \"Save List\"")
+    parser.add_argument("output", help="Path name of the merged PDF file")
+    parser.add_argument("--preferences", default="", help="Preferences.pkl file to read merge settings from")
+    parser.add_argument("--index", default="",
+                        help="Metadata index file to reuse (default: \"Metadata Index.pkl\" next to the preferences)")
+    parser.add_argument("--blank-page", action=argparse.BooleanOptionalAction, default=None,
+                        help="Add a blank page between files (default: preferences value or on)")
+    parser.add_argument("--compress", action=argparse.BooleanOptionalAction, default=None,
+                        help="Compress identical objects in the output (default: preferences value or on)")
+    parser.add_argument("--pre-parse", action=argparse.BooleanOptionalAction, default=None,
+                        help="Validate and index all inputs in worker processes before assembly (does not speed up "
+                             "the merge; default: preferences value or off)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Maximum number of pre-parse worker processes (0 uses one per CPU core)")
+    parser.add_argument("--check-contents", action=argparse.BooleanOptionalAction, default=None,
+                        help="Also report files with identical contents at different paths (default: on)")
+    parser.add_argument("--recompress", action=argparse.BooleanOptionalAction, default=None,
+                        help="Deflate uncompressed and Flate-compressed streams again on a thread pool (default: off)")
+    parser.add_argument("--compression-level", type=int, default=None, choices=range(1, 10), metavar="{1-9}",
+                        help="zlib level used by --recompress (default: 6)")
+    parser.add_argument("--optimize-images", action=argparse.BooleanOptionalAction, default=None,
+                        help="Downsample images above the target resolution (requires Pillow; default: off)")
+    parser.add_argument("--target-dpi", type=int, default=None,
+                        help="Resolution used by --optimize-images (default: 200)")
+    parser.add_argument("--object-streams", action=argparse.BooleanOptionalAction, default=None,
+                        help="Pack objects into compressed object streams with a cross-reference stream (default: off)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare the size, write time, and open time of the output with and without object "
+                             "streams")
+    parser.add_argument("--linearize", action=argparse.BooleanOptionalAction, default=None,
+                        help="Linearize the output for fast web view and check its hint tables (requires pikepdf; "
+                             "default: off)")
+    parser.add_argument("--dedup", action=argparse.BooleanOptionalAction, default=None,
+                        help="Remove identical objects as each file is added instead of after assembly (default: on)")
+    parser.add_argument("--dedup-stats", action="store_true",
+                        help="List the identical objects removed from each input")
+    parser.add_argument("--max-open-files", type=int, default=None,
+                        help="Maximum number of inputs kept open at once (default: 256)")
+    parser.add_argument("--file-stats", action="store_true",
+                        help="Show how often inputs were opened, reopened, and read while already open")
+    parser.add_argument("--memory-budget", type=int, default=None,
+                        help="Stream data (MB) kept in memory before it is moved to a temporary file (0 for no limit)")
+    parser.add_argument("--streaming", action=argparse.BooleanOptionalAction, default=None,
+                        help="Write streams to the output as each file is added instead of after assembly (images are "
+                             "not optimized and object streams are not used; default: off)")
+    parser.add_argument("--tree-merge", action=argparse.BooleanOptionalAction, default=None,
+                        help="Merge chunks of the list into intermediate files in worker processes, then combine them "
+                             "(default: off)")
+    parser.add_argument("--files-per-chunk", type=int, default=None,
+                        help="Files merged by each --tree-merge worker task (default: 100)")
+    parser.add_argument("--merge-workers", type=int, default=None,
+                        help="Maximum number of --tree-merge worker processes (0 uses one per CPU core)")
+    parser.add_argument("--remove-duplicates", action="store_true",
+                        help="Keep only the first instance of files listed more than once (or with identical contents)")
+    args = parser.parse_args(argv)
+
+    # Load preferences and metadata index (if specified)
+    preferences = {}
+    if args.preferences:
+        with (open(args.preferences, "rb")) as pref:
+            preferences = pickle.load(pref)
+
+    if args.index:
+        pdf_cache.load_index(args.index)
+    elif args.preferences:
+        pdf_cache.load_index(os.path.join(os.path.dirname(args.preferences), "Metadata Index.pkl"))
+
+    # Command line options override preferences file values
+    for key, value in [("Add Blank Page Between Files", args.blank_page), ("Compress Output", args.compress),
+                       ("Pre-Parse Inputs", args.pre_parse), ("Parse Workers", args.workers),
+                       ("Check Duplicate Contents", args.check_contents),
+                       ("Deduplicate While Merging", args.dedup), ("Recompress Streams", args.recompress),
+                       ("Compression Level", args.compression_level), ("Optimize Images", args.optimize_images),
+                       ("Image Target DPI", args.target_dpi), ("Object Streams", args.object_streams),
+                       ("Linearize Output", args.linearize),
+                       ("Max Open Files", args.max_open_files), ("Memory Budget (MB)", args.memory_budget),
+                       ("Streaming Output", args.streaming), ("Tree Merge", args.tree_merge),
+                       ("Files Per Chunk", args.files_per_chunk), ("Merge Workers", args.merge_workers)]:
+        if value is not None:
+            preferences.update({key: value})
+
+    # Check output extension
+    save_path = args.output.replace("\\", "/")
+    if save_path[-4:] != ".pdf":
+        save_path += ".pdf"
+
+    # Read file list and report duplicates
+    file_info, selected_pages = read_manifest(args.manifest)
+    if len(file_info) == 0:
+        print(f"No files were found in \"{args.manifest}\".", file=sys.stderr)
+        return 1
+
+    duplicates = find_duplicate_paths(file_info)
+    for path, index_list in duplicates.items():
+        print(f"The file {path} was found at positions {[index + 1 for index in index_list]}.", file=sys.stderr)
+    content_duplicates = {}
+    if preferences.get("Check Duplicate Contents", True):
+        content_duplicates = find_duplicate_contents(file_info)
+    for path, index_list in content_duplicates.items():
+        print(f"Files with the same contents as {path} were found at positions {[index + 1 for index in index_list]}.",
+              file=sys.stderr)
+    if args.remove_duplicates:
+        remove_duplicate_entries(file_info, [*duplicates.values(), *content_duplicates.values()])
+
+    engine = MergeEngine(file_info, selected_pages, save_path, preferences=preferences)
+    if preferences.get("Optimize Images", False) and not pillow_available:
+        print("Images were not optimized because the \"Pillow\" package is not installed.", file=sys.stderr)
+    if preferences.get("Linearize Output", False) and not pikepdf_available:
+        print("The output was not linearized because the \"pikepdf\" package is not installed.", file=sys.stderr)
+    try:
+        engine.run()
+    except (OSError, AttributeError, PyPdfError) as error:
+        print(f"Merge failed: {error}", file=sys.stderr)
+        engine.close()
+        return 1
+
+    for skipped_file in engine.skipped_files:
+        print(f"The file \"{skipped_file}\" was not found and was skipped.", file=sys.stderr)
+    for invalid_file, error in engine.invalid_files:
+        print(f"The file \"{invalid_file}\" could not be read and was skipped ({error}).", file=sys.stderr)
+
+    if engine.object_index is not None:
+        if args.dedup_stats:
+            for file_name, removed, saved in engine.object_index.stats:
+                print(f"{file_name}: {removed} identical objects removed ({saved / (1024 ** 2):.2f} MB)")
+        print(f"{engine.object_index.objects_removed} identical objects removed "
+              f"({engine.object_index.bytes_saved / (1024 ** 2):.1f} MB saved).")
+
+    if engine.optimize_images:
+        saved = sum(old_size - new_size for *_, old_size, new_size in engine.image_results)
+        print(f"{len(engine.image_results)} images downsampled ({saved / (1024 ** 2):.1f} MB saved).")
+
+    if engine.recompress:
+        print(f"{engine.recompressed_streams} streams recompressed ({engine.recompress_saved / (1024 ** 2):.1f} MB "
+              f"saved).")
+
+    if engine.linearize:
+        if engine.linearization_ok:
+            print("The output was linearized and its hint tables were verified.")
+        else:
+            print(f"The linearized output failed verification:\n{engine.linearization_report}", file=sys.stderr)
+
+    if engine.spill_store is not None and engine.spill_store.streams_spilled > 0:
+        print(f"{engine.spill_store.streams_spilled} streams moved to disk "
+              f"({engine.spill_store.bytes_spilled / (1024 ** 2):.1f} MB) to stay within the memory budget.")
+
+    if args.file_stats:
+        print(f"Input files: {handle_pool.opens} opened ({handle_pool.reopens} reopened), {handle_pool.hits} reads "
+              f"from open files, at most {handle_pool.peak_handles} open at once.")
+
+    if args.benchmark and engine.streaming:
+        print("The output cannot be benchmarked in streaming mode (the merger no longer holds its streams).",
+              file=sys.stderr)
+    elif args.benchmark:
+        for mode, size, write_time, open_time in engine.benchmark_output():
+            print(f"{mode}: {size / (1024 ** 2):.2f} MB, written in {write_time:.2f} s, opened in {open_time:.3f} s")
+    engine.close()
+
+    merged_count = len(file_info) - len(engine.skipped_files) - len(engine.invalid_files)
+    file_count = "1 file was" if merged_count == 1 else f"{merged_count} files were"
+    print(f"{file_count} merged into \"{save_path}\" ({os.path.getsize(save_path) / (1024 ** 2):.1f} MB).")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Hash index of the objects in a PdfWriter, used to remove identical objects as each file is added.
+
+Fonts, logos, and form backgrounds are often repeated across many inputs. Checking only the objects added by the latest
+file (rather than every object once the merger is complete) means each duplicate is dropped soon after it is copied.
+"""
+
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, PdfObject, StreamObject
+
+# Dictionary types that can be shared between pages without changing the output (resources only; pages, annotations,
+# outlines, and form fields are referenced by the document structure and are never merged)
+mergeable_types = {"/Font", "/FontDescriptor", "/ExtGState", "/Pattern", "/Shading", "/XObject", "/Encoding"}
+
+# Catalog entries that only lead to pages, form fields, and outline items (references to them are updated, but they are
+# not searched, since they are never merged and files added later do not add references to their contents)
+structure_keys = {"/Pages", "/Fields", "/Outlines", "/Threads", "/StructTreeRoot", "/Parent", "/P"}
+
+
+class ObjectIndex:
+    """Index of object hashes for one PdfWriter, with per-file statistics of the objects removed."""
+
+    def __init__(self, writer: PdfWriter) -> None:
+        """
+        Create an empty index. Objects already in the writer are not indexed.
+
+        :param writer: PdfWriter that files are being added to
+        """
+
+        self.writer = writer
+        self.hashes = {}  # Kept IndirectObject keyed by object hash
+        self.checked = len(writer._objects)  # Number of writer objects already checked
+        self.stats = []  # (file name, objects removed, bytes saved) tuples in the order files were added
+        self.objects_removed = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def can_merge(obj: PdfObject) -> bool:
+        """
+        Check if an object is a resource that can be replaced by an identical object.
+
+        :param obj: Writer object
+        :return: True for streams and resource dictionaries
+        """
+
+        if isinstance(obj, StreamObject):
+            return obj.get("/Type") != "/XRef"
+        return isinstance(obj, DictionaryObject) and obj.get("/Type") in mergeable_types
+
+    @staticmethod
+    def replace_references(obj: PdfObject, crossref: dict[int, IndirectObject]) -> None:
+        """
+        Point references to removed objects at the kept objects (including inside direct dictionaries and arrays).
+
+        :param obj: Object to update
+        :param crossref: Kept IndirectObject keyed by the object number of each removed object
+        :return:
+        """
+
+        if isinstance(obj, DictionaryObject):
+            items = list(obj.items())
+        elif isinstance(obj, ArrayObject):
+            items = list(enumerate(obj))
+        else:
+            return
+
+        for key, value in items:
+            if isinstance(value, IndirectObject):
+                if value.idnum in crossref.keys():
+                    obj[key] = crossref[value.idnum]
+            else:
+                ObjectIndex.replace_references(value, crossref)
+
+    def document_objects(self) -> list[PdfObject]:
+        """
+        Collect the objects reachable from the catalog that were added before the latest file, other than pages, form
+        fields, and outline items (e.g. the catalog, the form's default resources, and the name trees).
+
+        Adding a file can add references to its objects to these (a form's fonts to the default resources of the merged
+        form, for example), so they are updated along with the new objects.
+
+        :return: List of document-level writer objects
+        """
+
+        objects = self.writer._objects
+        root = self.writer._root_object
+        found = [root]
+        visited = {root.indirect_reference.idnum}
+        pending = [root]
+        while len(pending) > 0:
+            obj = pending.pop()
+            if isinstance(obj, DictionaryObject):
+                if obj.get("/Type") in ("/Page", "/Pages", "/Annot") or "/FT" in obj.keys() or "/Title" in obj.keys():
+                    continue  # Page, form field, or outline item
+                values = [value for key, value in obj.items() if key not in structure_keys]
+            elif isinstance(obj, ArrayObject):
+                values = list(obj)
+            else:
+                continue
+
+            for value in values:
+                if not isinstance(value, IndirectObject):
+                    pending.append(value)  # Direct dictionary or array
+                elif value.idnum not in visited and value.idnum <= self.checked:
+                    visited.add(value.idnum)
+                    if objects[value.idnum - 1] is not None:
+                        found.append(objects[value.idnum - 1])
+                        pending.append(objects[value.idnum - 1])
+
+        return found
+
+    @staticmethod
+    def object_size(obj: PdfObject) -> int:
+        """
+        Measure the approximate written size of an object.
+
+        :param obj: Writer object
+        :return: Stream data length for streams, written size otherwise
+        """
+
+        if isinstance(obj, StreamObject):
+            return len(obj._data)
+
+        buffer = BytesIO()
+        obj.write_to_stream(buffer)
+        return len(buffer.getbuffer())
+
+    def deduplicate(self, reader: PdfReader, file_name: str) -> tuple[int, int]:
+        """
+        Remove objects added since the last call that are identical to an indexed object, then index the rest.
+
+        Objects are checked from newest to oldest so objects referenced by a dictionary (usually added after it) are
+        replaced before the dictionary is hashed. References to removed objects are then updated in the new objects,
+        the document-level objects that existed before (see document_objects), and the reader's translation table in
+        the writer, so later pages from the same reader use the kept objects.
+
+        :param reader: Reader the objects were copied from
+        :param file_name: Name of the file (for the statistics)
+        :return: Tuple of (objects removed, bytes saved)
+        """
+
+        objects = self.writer._objects
+        crossref = {}  # Kept IndirectObject keyed by removed object number
+        removed = 0
+        saved = 0
+
+        for i in range(len(objects) - 1, self.checked - 1, -1):
+            obj = objects[i]
+            if obj is None or not self.can_merge(obj):
+                continue
+
+            self.replace_references(obj, crossref)
+            obj_hash = obj.hash_value()
+            if obj_hash not in self.hashes.keys():
+                self.hashes.update({obj_hash: obj.indirect_reference})
+                continue
+
+            crossref.update({i + 1: self.hashes[obj_hash]})
+            saved += self.object_size(obj)
+            removed += 1
+            objects[i] = None
+
+        # Update references in the remaining new objects, the older document-level objects, and the reader's
+        # translation table
+        if len(crossref) > 0:
+            for i in range(self.checked, len(objects)):
+                if objects[i] is not None:
+                    self.replace_references(objects[i], crossref)
+            for obj in self.document_objects():
+                self.replace_references(obj, crossref)
+
+            translated = self.writer._id_translated.get(id(reader), {})
+            for source, target in translated.items():
+                if source != "PreventGC" and target in crossref.keys():
+                    translated[source] = crossref[target].idnum
+
+        self.checked = len(objects)
+        self.stats.append((file_name, removed, saved))
+        self.objects_removed += removed
+        self.bytes_saved += saved
+
+        return removed, saved
@@ -0,0 +1,172 @@
+"""
+Compact representation of the pages to merge from one file.
+
+A page selection string such as "1-40000,1-40000" is stored as a list of page ranges rather than a list of every page
+number, so removing duplicates and resorting depend on the number of ranges instead of the number of pages.
+"""
+
+import bisect
+import itertools
+from typing import Iterator
+
+
+class PagePlan:
+    """Ordered list of (first page, last page, repeat count) ranges; pages are numbered from 1."""
+
+    def __init__(self, ranges: list[tuple[int, int, int]] = ()) -> None:
+        """
+        Create a plan from a list of ranges.
+
+        :param ranges: List of (first page, last page, repeat count) tuples; each page in a range is used repeat count
+            times in a row (always 1 unless a resorted plan contains duplicates)
+        """
+
+        self.ranges = [(first, last, repeat) for first, last, repeat in ranges if first <= last and repeat > 0]
+
+    @classmethod
+    def from_string(cls, page_str: str, resort: bool = False, remove_dup: bool = False) -> "PagePlan":
+        """
+        Create a plan from a page selection string (e.g. "1-5,8,10-12").
+
+        :param page_str: Comma-separated page numbers and dash-separated page ranges
+        :param resort: Flag for whether pages should be sorted to their original order
+        :param remove_dup: Flag for whether only the first use of each page should be kept
+        :return: New PagePlan
+        """
+
+        ranges = []
+        for item in page_str.split(","):
+            # Single item
+            if "-" not in item:
+                try:
+                    ranges.append((int(item), int(item), 1))
+                except ValueError:  # "Empty" number (two consecutive commas in input string)
+                    pass
+                continue
+
+            # Range of items
+            min_num, max_num = item.split("-")
+            ranges.append((int(min_num), int(max_num), 1))
+
+        plan = cls(ranges)
+        if remove_dup:
+            plan = plan.unique()
+        if resort:
+            plan = plan.sorted()
+
+        return plan
+
+    def __iter__(self) -> Iterator[int]:
+        """Yield each page number in order without building the full list."""
+
+        for first, last, repeat in self.ranges:
+            for page in range(first, last + 1):
+                for _ in range(repeat):
+                    yield page
+
+    def __len__(self) -> int:
+        """Return the number of pages in the plan (including repeats)."""
+        return sum((last - first + 1) * repeat for first, last, repeat in self.ranges)
+
+    def __repr__(self) -> str:
+        return f"PagePlan({self.ranges})"
+
+    def unique(self) -> "PagePlan":
+        """
+        Remove every page already used earlier in the plan.
+
+        Pages already used are tracked as a sorted list of disjoint ranges, so each range is only compared with the
+        ranges it overlaps.
+
+        :return: New PagePlan keeping the first use of each page
+        """
+
+        used_firsts = []  # First pages of used ranges (sorted)
+        used_lasts = []  # Matching last pages
+        ranges = []
+        for first, last, _ in self.ranges:
+            # Keep the parts of the range that fall between used ranges
+            i = bisect.bisect_right(used_firsts, first) - 1
+            if i < 0 or used_lasts[i] < first:
+                i += 1
+            page = first
+            while page <= last:
+                if i < len(used_firsts) and used_firsts[i] <= last:
+                    if page < used_firsts[i]:
+                        ranges.append((page, used_firsts[i] - 1, 1))
+                    page = max(page, used_lasts[i] + 1)
+                    i += 1
+                else:
+                    ranges.append((page, last, 1))
+                    break
+
+            # Mark the range as used (merging it with any used ranges it overlaps or touches)
+            lo = bisect.bisect_left(used_lasts, first - 1)
+            hi = bisect.bisect_right(used_firsts, last + 1)
+            if lo < hi:
+                first = min(first, used_firsts[lo])
+                last = max(last, used_lasts[hi - 1])
+            used_firsts[lo:hi] = [first]
+            used_lasts[lo:hi] = [last]
+
+        return PagePlan(ranges)
+
+    def sorted(self) -> "PagePlan":
+        """
+        Sort the pages to their original order.
+
+        Overlapping ranges are split at their boundaries, and pages covered by more than one range are repeated.
+
+        :return: New PagePlan in ascending page order
+        """
+
+        # Count how many ranges cover each span between consecutive boundaries
+        changes = {}
+        for first, last, repeat in self.ranges:
+            changes[first] = changes.get(first, 0) + repeat
+            changes[last + 1] = changes.get(last + 1, 0) - repeat
+
+        ranges = []
+        depth = 0
+        bounds = sorted(changes.keys())
+        for start, stop in zip(bounds, bounds[1:]):
+            depth += changes[start]
+            if depth > 0:
+                if len(ranges) > 0 and ranges[-1][1] == start - 1 and ranges[-1][2] == depth:
+                    ranges[-1] = (ranges[-1][0], stop - 1, depth)
+                else:
+                    ranges.append((start, stop - 1, depth))
+
+        return PagePlan(ranges)
+
+    def runs(self) -> Iterator[tuple[int, int]]:
+        """
+        Yield (first page, last page) runs of consecutive ascending pages, joining adjacent ranges.
+
+        :return: Iterator of runs in plan order
+        """
+
+        run = None
+        for first, last, repeat in self.ranges:
+            pieces = [(first, last)] if repeat == 1 else [(page, page) for page in range(first, last + 1)
+                                                          for _ in range(repeat)]
+            for piece in pieces:
+                if run is not None and piece[0] == run[1] + 1:
+                    run = (run[0], piece[1])
+                    continue
+                if run is not None:
+                    yield run
+                run = piece
+
+        if run is not None:
+            yield run
+
+    def covers_all(self, page_count: int) -> bool:
+        """
+        Check if the plan is every page of the file once, in order (in any notation, e.g. "1-3,4-10" for 10 pages).
+
+        :param page_count: Number of pages in the file
+        :return: True if the whole file would be merged unchanged
+        """
+
+        return list(itertools.islice(self.runs(), 2)) == [(1, page_count)]
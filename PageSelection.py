@@ -2,7 +2,7 @@ import copy
 import os
 
 from LabelButton import *
-from pypdf import PdfReader
+from PdfCache import pdf_cache
 from tkinter import messagebox
 
 class PageSelection(Toplevel):
@@ -41,8 +41,14 @@ class PageSelection(Toplevel):
         else:
             file_folder = os.path.dirname(self.file_path).split("/")[-1]
 
-        # Determine number of pages in file
-        self.max_page = PdfReader(self.file_path).get_num_pages()
+        # Determine number of pages in file (parsed once per session by the shared cache)
+        file_metadata = pdf_cache.get_metadata(self.file_path)
+        if file_metadata["error"]:
+            messagebox.showerror(title="Invalid File", message=f"The file \"{self.file_name}\" could not be read.\n"
+                                                               f"{file_metadata['error']}")
+            self.destroy()
+            return
+        self.max_page = file_metadata["pages"]
         
         # Create new Toplevel
         self.title(f"Item {index + 1} Page Selection")
@@ -0,0 +1,376 @@
+"""
+Process-wide cache of PdfReader objects and file metadata.
+
+Entries are keyed by (full path, modification time, byte size), so a file that changes on disk is parsed again.
+Readers are evicted in least-recently-used order once their total size exceeds the memory budget. Metadata is small,
+is kept for the whole session, and can be saved to a metadata index file so it is reused by later sessions.
+
+Cached readers read through the shared HandlePool, which serves files from read-only memory maps by default, so only
+the parts of a file that are parsed or copied are loaded (by the OS page cache, which is shared between readers and
+processes) instead of pypdf reading the whole file into memory. The pool also limits the number of open files, however
+many readers are kept.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from pypdf import PdfReader
+
+from HandlePool import handle_pool
+
+
+def file_key(path: str) -> tuple[str, float, int]:
+    """
+    Get the cache key of a file.
+
+    :param path: Full path name of the file
+    :return: Tuple of (full path, modification time, byte size)
+    :raises OSError: The file cannot be accessed
+    """
+
+    stat = os.stat(path)
+    return path, stat.st_mtime, stat.st_size
+
+
+def map_file(path: str) -> Optional[mmap.mmap]:
+    """
+    Map a file into memory read-only.
+
+    :param path: Full path name of the file
+    :return: Memory map of the file, or None if the file is empty or cannot be mapped (e.g. on some network drives)
+    :raises OSError: The file cannot be opened
+    """
+
+    with open(path, "rb") as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # ValueError for empty files
+            return None
+
+
+def open_mapped(path: str) -> PdfReader:
+    """
+    Open a reader on a memory map of the file, falling back to pypdf's own file reading if the file cannot be mapped.
+
+    :param path: Full path name of the PDF file
+    :return: PdfReader for the file
+    :raises OSError: The file cannot be opened
+    """
+
+    mapped = map_file(path)
+    return PdfReader(mapped) if mapped is not None else PdfReader(path)
+
+
+def open_pooled(path: str) -> PdfReader:
+    """
+    Open a reader that reads through the shared HandlePool.
+
+    :param path: Full path name of the PDF file
+    :return: PdfReader for the file
+    :raises OSError: The file cannot be accessed
+    """
+
+    return PdfReader(handle_pool.open(path))
+
+
+def file_hash(path: str) -> str:
+    """
+    Calculate the SHA-256 hash of a file's contents (directly from a memory map of the file when possible).
+
+    :param path: Full path name of the file
+    :return: Hexadecimal digest
+    """
+
+    digest = hashlib.sha256()
+    mapped = map_file(path)
+    if mapped is not None:
+        with mapped:
+            digest.update(mapped)
+        return digest.hexdigest()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 ** 2), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def file_metadata(path: str, open_reader: Callable[[str], PdfReader] = PdfReader, with_hash: bool = False) -> dict:
+    """
+    Open, validate, and index a PDF file. Also used by the merge engine's pre-parse worker processes.
+
+    Page sizes are stored as (width, height, number of consecutive pages) tuples to keep the index small.
+
+    :param path: Full path name of the PDF file
+    :param open_reader: Function returning a reader for the path (e.g. from the cache)
+    :param with_hash: Flag for whether the content hash should be calculated (otherwise left empty until needed)
+    :return: Dictionary of the file's size, modification time, content hash, page count, page sizes, encryption flag,
+        and error message (empty if the file is valid)
+    """
+
+    info = {"path": path, "size": 0, "mtime": 0.0, "hash": "", "pages": 0, "page_sizes": [], "encrypted": False,
+            "error": ""}
+    try:
+        _, info["mtime"], info["size"] = file_key(path)
+        reader = open_reader(path)
+        info["encrypted"] = reader.is_encrypted
+        for page in reader.pages:
+            page_size = (float(page.mediabox.width), float(page.mediabox.height))
+            if len(info["page_sizes"]) > 0 and info["page_sizes"][-1][:2] == page_size:
+                info["page_sizes"][-1] = (*page_size, info["page_sizes"][-1][2] + 1)
+            else:
+                info["page_sizes"].append((*page_size, 1))
+            info["pages"] += 1
+        if with_hash:
+            info["hash"] = file_hash(path)
+    except Exception as error:  # Any parsing failure makes the file invalid
+        info["error"] = f"{type(error).__name__}: {error}"
+
+    return info
+
+
+class PdfCache:
+    """Least-recently-used cache of PdfReader objects with a memory budget, plus a metadata store."""
+
+    def __init__(self, memory_budget: int = 512 * 1024 ** 2) -> None:
+        """
+        Create an empty cache.
+
+        :param memory_budget: Maximum total size (bytes) of the files held by cached readers
+        """
+
+        self.memory_budget = memory_budget
+        self.readers = OrderedDict()  # Readers keyed by file_key, least recently used first
+        self.reader_bytes = 0  # Total size of the files held by cached readers
+        self.metadata = {}  # file_metadata dictionaries keyed by full path
+        self.hashes = {}  # (modification time, byte size, content hash) tuples keyed by full path
+        self.index_file = ""  # Metadata index file (empty if metadata is not saved between sessions)
+        self.lock = threading.RLock()  # Cache is shared by the window and merge threads
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def load_index(self, index_file: str) -> None:
+        """
+        Load saved metadata from the index file; entries are only used while the file's mtime and size match.
+
+        An unreadable index is ignored (and replaced on the next save).
+
+        :param index_file: Full path name of the metadata index file
+        :return:
+        """
+
+        with self.lock:
+            self.index_file = index_file
+            try:
+                with (open(index_file, "rb")) as index:
+                    saved = pickle.load(index)
+                if saved.get("version") == 1:
+                    for path, info in saved["entries"].items():
+                        self.metadata.setdefault(path, info)  # Metadata from this session takes precedence
+                    for path, entry in saved.get("hashes", {}).items():
+                        self.hashes.setdefault(path, entry)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+                pass
+
+    def save_index(self) -> None:
+        """Save valid metadata to the index file (if one was loaded). The file is replaced only once fully written."""
+
+        with self.lock:
+            if not self.index_file:
+                return
+            entries = {path: info for path, info in self.metadata.items() if not info["error"]}
+            hashes = dict(self.hashes)
+
+        try:
+            with (open(f"{self.index_file}.tmp", "wb")) as index:
+                pickle.dump({"version": 1, "entries": entries, "hashes": hashes}, index)
+            os.replace(f"{self.index_file}.tmp", self.index_file)
+        except OSError:  # Index is only an optimization, so failing to save it is not an error
+            pass
+
+    def set_memory_budget(self, memory_budget: int) -> None:
+        """
+        Change the memory budget and evict readers if needed.
+
+        :param memory_budget: Maximum total size (bytes) of the files held by cached readers
+        :return:
+        """
+
+        with self.lock:
+            self.memory_budget = memory_budget
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used readers until the memory budget is met (the newest reader is always kept)."""
+
+        while self.reader_bytes > self.memory_budget and len(self.readers) > 1:
+            (_, _, size), _ = self.readers.popitem(last=False)
+            self.reader_bytes -= size
+
+    def get_reader(self, path: str) -> PdfReader:
+        """
+        Get a reader for the file, parsing it only if it is not cached or has changed on disk.
+
+        The file is parsed outside the lock, so other threads are not blocked by a large file.
+
+        :param path: Full path name of the PDF file
+        :return: PdfReader for the file
+        :raises OSError: The file cannot be accessed
+        """
+
+        key = file_key(path)
+        with self.lock:
+            if key in self.readers.keys():
+                self.readers.move_to_end(key)
+                self.hits += 1
+                return self.readers[key]
+
+            self.misses += 1
+
+        reader = open_pooled(path)
+        with self.lock:
+            if key in self.readers.keys():  # Opened by another thread while this one was parsing
+                self.readers.move_to_end(key)
+                return self.readers[key]
+
+            # Drop any outdated reader for the same path
+            for old_key in [old_key for old_key in self.readers.keys() if old_key[0] == path]:
+                self.readers.pop(old_key)
+                self.reader_bytes -= old_key[2]
+
+            self.readers.update({key: reader})
+            self.reader_bytes += key[2]
+            self._evict()
+
+        return reader
+
+    def get_metadata(self, path: str) -> dict:
+        """
+        Get the metadata of the file, parsing it only if it is not cached or has changed on disk.
+
+        The file is parsed outside the lock, so other threads are not blocked by a large file.
+
+        :param path: Full path name of the PDF file
+        :return: Dictionary as returned by file_metadata
+        """
+
+        with self.lock:
+            if self.has_metadata(path):
+                self.hits += 1
+                return self.metadata[path]
+
+        info = file_metadata(path, self.get_reader)
+        with self.lock:
+            self.metadata.update({path: info})
+
+        return info
+
+    def has_metadata(self, path: str) -> bool:
+        """
+        Check if up-to-date metadata is cached for the file.
+
+        :param path: Full path name of the PDF file
+        :return: True if the cached metadata matches the file on disk
+        """
+
+        try:
+            _, mtime, size = file_key(path)
+        except OSError:
+            return False
+
+        with self.lock:
+            info = self.metadata.get(path)
+            return info is not None and info["mtime"] == mtime and info["size"] == size
+
+    def store_metadata(self, info: dict) -> None:
+        """
+        Store metadata produced elsewhere (e.g. by a pre-parse worker process).
+
+        :param info: Dictionary as returned by file_metadata
+        :return:
+        """
+
+        with self.lock:
+            self.metadata.update({info["path"]: info})
+
+    def get_content_hash(self, path: str) -> str:
+        """
+        Get the content hash of the file, calculating it only if it is not in the (up-to-date) metadata or hash store.
+
+        The file is not parsed, and the hash is calculated outside the lock so several files can be hashed at once.
+
+        :param path: Full path name of the file
+        :return: Hexadecimal SHA-256 digest
+        :raises OSError: The file cannot be accessed
+        """
+
+        _, mtime, size = file_key(path)
+        with self.lock:
+            info = self.metadata.get(path)
+            if info is not None and (info["mtime"], info["size"]) != (mtime, size):
+                info = None
+            if info is not None and info["hash"]:
+                self.hits += 1
+                return info["hash"]
+
+            entry = self.hashes.get(path)
+            if entry is not None and entry[:2] == (mtime, size):
+                self.hits += 1
+                return entry[2]
+
+        digest = file_hash(path)
+        with self.lock:
+            self.hashes.update({path: (mtime, size, digest)})
+            if info is not None:
+                info["hash"] = digest
+
+        return digest
+
+    def indexed_size(self, path: str) -> Optional[int]:
+        """
+        Get the byte size of the file from the metadata (including the index) without accessing the file.
+
+        :param path: Full path name of the file
+        :return: Size of the file in bytes or None if the file has no metadata
+        """
+
+        with self.lock:
+            if path in self.metadata.keys():
+                return self.metadata[path]["size"]
+
+        return None
+
+    def release(self, path: str) -> None:
+        """
+        Remove the cached readers of a file and close its open files in the HandlePool, so the file can be replaced.
+        Readers already used to add pages to a PdfWriter are no longer needed once the pages are added.
+
+        :param path: Full path name of the PDF file
+        :return:
+        """
+
+        with self.lock:
+            for key in [key for key in self.readers.keys() if key[0] == path]:
+                self.readers.pop(key).stream.close()
+                self.reader_bytes -= key[2]
+        handle_pool.close_path(path)  # Also closes files opened by readers no longer in the cache
+
+    def clear(self) -> None:
+        """Remove all cached readers and metadata."""
+
+        with self.lock:
+            self.readers.clear()
+            self.reader_bytes = 0
+            self.metadata.clear()
+            self.hashes.clear()
+
+
+# Cache shared by every window and merge in the process
+pdf_cache = PdfCache()
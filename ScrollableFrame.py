@@ -2,12 +2,20 @@ from tkinter import *
 from tkinter import ttk
 import tkinter
 from tkinter import font
+from typing import Callable, Optional
 
 
 class ScrollableFrame(ttk.Frame):
-    """A frame with x and/or y scrollbars and a built-in dark mode."""
+    """
+    A frame with x and/or y scrollbars and a built-in dark mode.
+
+    In virtual mode, the frame holds a fixed number of row "slots" and only the rows in view are drawn. Scrolling
+    refills the slots from the caller's data instead of moving the canvas, so the number of widgets does not depend on
+    the number of rows.
+    """
     def __init__(self, master: tkinter.Misc, dark_mode: bool = False, dims: str = "xy",
-                 location: list = (0, 0), span: list = (1, 1), padding: list = ((0, 0), (0, 0)), **kwargs):
+                 location: list = (0, 0), span: list = (1, 1), padding: list = ((0, 0), (0, 0)),
+                 virtual_rows: int = 0, **kwargs):
         """
         Initialize scrollable frame.
 
@@ -19,6 +27,7 @@ class ScrollableFrame(ttk.Frame):
         :param location: The (x, y) grid coordinates of the scrollable frame in the parent container
         :param padding: The (x, y) padding of the scrollable frame in the parent container
         :param span: The (row span, column span) values to use for the container
+        :param virtual_rows: Number of row slots to draw in virtual mode (0 for a standard scrollable frame)
         """
 
         # Passed parameters
@@ -32,13 +41,25 @@ class ScrollableFrame(ttk.Frame):
         # List of headers
         self.header_list = []
 
+        # Virtual mode attributes
+        self.virtual_rows = virtual_rows
+        self.row_count = 0  # Number of data rows
+        self.first_row = 0  # Data index shown in the first slot
+        self.slots = []  # List of widget lists, one per slot
+        self.create_row = None  # Called with a slot number; returns the slot's widgets
+        self.fill_row = None  # Called with a slot number and data index; updates the slot's widgets
+
         # Define main containers
         self.container = ttk.Frame(self.win)  # Frame to hold scrollbars and canvas
         self.canvas = Canvas(self.container, **kwargs)  # Scrollable component
         super().__init__(self.canvas)  # Frame for user-specified child widgets
 
         # Define scroll bars based on user specification
-        if "y" in dims:
+        if "y" in dims and self.virtual_rows > 0:  # Scrollbar moves the slots rather than the canvas
+            self.y_scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self._virtual_yview)
+            self.y_scrollbar.grid(row=0, column=1, rowspan=2, sticky="ns")
+            self.y_scrollbar.set(0, 1)
+        elif "y" in dims:
             self.y_scrollbar = ttk.Scrollbar(self.container, orient="vertical", command=self.canvas.yview)
             self.y_scrollbar.grid(row=0, column=1, rowspan=2, sticky="ns")
             self.canvas.configure(yscrollcommand=self.y_scrollbar.set)
@@ -131,3 +152,119 @@ class ScrollableFrame(ttk.Frame):
         header.lower()
 
         self.header_list.append(header)
+
+    # Virtual mode methods
+    def set_row_callbacks(self, create_row: Callable[[int], list], fill_row: Callable[[int, int], None]) -> None:
+        """
+        Set the functions used to draw rows in virtual mode.
+
+        :param create_row: Called once per slot with the slot number; must grid the slot's widgets in that row of the
+            frame and return them
+        :param fill_row: Called with a slot number and the data index to show in it
+        :return:
+        """
+
+        self.create_row = create_row
+        self.fill_row = fill_row
+
+    def visible_count(self) -> int:
+        """Return the number of slots currently showing data."""
+        return min(self.virtual_rows, self.row_count)
+
+    def row_index(self, slot: int) -> int:
+        """
+        Convert a slot number (grid row) to a data index.
+
+        :param slot: Slot number
+        :return: Data index shown in the slot
+        """
+
+        return self.first_row + slot
+
+    def set_row_count(self, row_count: int) -> None:
+        """
+        Set the number of data rows, creating or hiding slots as needed, then redraw the visible rows.
+
+        :param row_count: Number of data rows
+        :return:
+        """
+
+        self.row_count = row_count
+
+        # Create missing slots (only up to the number of rows in view)
+        while len(self.slots) < self.visible_count():
+            widgets = self.create_row(len(self.slots))
+            for widget in widgets:
+                widget.bind("<MouseWheel>", self._on_mouse_wheel, add="+")
+                widget.bind("<Button-4>", self._on_mouse_wheel, add="+")
+                widget.bind("<Button-5>", self._on_mouse_wheel, add="+")
+            self.slots.append(widgets)
+
+        # Show slots with data and hide the rest
+        for slot, widgets in enumerate(self.slots):
+            for widget in widgets:
+                if slot < self.visible_count():
+                    widget.grid()
+                else:
+                    widget.grid_remove()
+
+        # Keep first row within range, then redraw
+        self.first_row = max(0, min(self.first_row, self.row_count - self.visible_count()))
+        self.refresh()
+
+    def refresh(self, start: int = 0, stop: Optional[int] = None) -> None:
+        """
+        Refill the visible slots whose data index is between start (inclusive) and stop (exclusive).
+
+        :param start: First data index to redraw
+        :param stop: Data index after the last one to redraw (defaults to the end of the data)
+        :return:
+        """
+
+        stop = self.row_count if stop is None else stop
+        for slot in range(max(0, start - self.first_row), min(self.visible_count(), stop - self.first_row)):
+            self.fill_row(slot, self.first_row + slot)
+
+        self._update_scrollbar()
+
+    def scroll_to(self, first_row: int) -> None:
+        """
+        Show the data starting at the given index in the first slot.
+
+        :param first_row: Data index to show in the first slot
+        :return:
+        """
+
+        first_row = max(0, min(first_row, self.row_count - self.visible_count()))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.refresh()
+
+    def _virtual_yview(self, *args) -> None:
+        """Handle scrollbar commands ("moveto" or "scroll") in virtual mode."""
+
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            step = int(args[1]) if args[2] == "units" else int(args[1]) * self.visible_count()
+            self.scroll_to(self.first_row + step)
+
+    def _on_mouse_wheel(self, event: Event) -> None:
+        """Scroll three rows per mouse wheel step in virtual mode."""
+
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first_row - 3)
+        elif event.num == 5 or event.delta < 0:
+            self.scroll_to(self.first_row + 3)
+
+    def _update_scrollbar(self) -> None:
+        """Set the scrollbar slider to the visible fraction of the data in virtual mode."""
+
+        if self.y_scrollbar is None:
+            return
+
+        if self.row_count == 0:
+            self.y_scrollbar.set(0, 1)
+        else:
+            self.y_scrollbar.set(self.first_row / self.row_count,
+                                 (self.first_row + self.visible_count()) / self.row_count)
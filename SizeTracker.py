@@ -0,0 +1,156 @@
+"""
+Running total of the sizes of the files in the list, shown in the main window.
+
+The total is adjusted as files are added and removed instead of checking every file again. File sizes come from the
+metadata index when available and are checked on a background thread otherwise, so adding thousands of files (or files
+on a slow network drive) does not block the window.
+"""
+
+import os
+import queue
+import time
+from threading import Lock, Thread
+from typing import Optional
+
+from PdfCache import pdf_cache
+
+
+class SizeTracker:
+    """
+    Running total of the byte sizes of the listed files.
+
+    Adding or removing a file changes the total by that file's cached size, so the total never requires checking every
+    file. File sizes are checked on a background thread; poll (called from the window thread) applies the results.
+    The list state is guarded by a lock, since the merge thread also resets the total.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0) -> None:
+        """
+        Create an empty tracker and start the background thread.
+
+        :param refresh_interval: Seconds between background re-checks of every listed file's size
+        """
+
+        self.refresh_interval = refresh_interval
+        self.uid_paths = {}  # Full path keyed by unique ID
+        self.path_counts = {}  # Number of listed instances keyed by full path
+        self.path_sizes = {}  # Cached size (bytes) keyed by full path
+        self.total = 0  # Total size (bytes) of all listed instances
+        self.lock = Lock()  # Shared by the window and merge threads
+
+        self.pending = queue.Queue()  # Paths to check on the background thread
+        self.results = queue.Queue()  # (path, size) tuples from the background thread
+        self.last_refresh = time.monotonic()
+
+        Thread(target=self._check_sizes, daemon=True).start()
+
+    def _check_sizes(self) -> None:
+        """Check the size of each pending path and queue the result (runs on the background thread)."""
+
+        while True:
+            path = self.pending.get()
+            try:
+                size = os.path.getsize(path)
+            except OSError:  # File was moved or deleted
+                size = 0
+            self.results.put((path, size))
+
+    def add(self, uid: int, path: str) -> None:
+        """
+        Add a file to the total using its cached or indexed size; unknown sizes are checked in the background.
+
+        :param uid: Unique ID of the listed file
+        :param path: Full path name of the file
+        :return:
+        """
+
+        with self.lock:
+            self._add(uid, path)
+
+    def _add(self, uid: int, path: str) -> None:
+        """
+        Add a file to the total (the lock must be held).
+
+        :param uid: Unique ID of the listed file
+        :param path: Full path name of the file
+        :return:
+        """
+
+        self.uid_paths.update({uid: path})
+        self.path_counts.update({path: self.path_counts.get(path, 0) + 1})
+
+        if path not in self.path_sizes.keys():
+            indexed_size = pdf_cache.indexed_size(path)
+            self.path_sizes.update({path: indexed_size if indexed_size is not None else 0})
+            self.pending.put(path)
+
+        self.total += self.path_sizes[path]
+
+    def remove(self, uid: int) -> None:
+        """
+        Remove a file from the total.
+
+        :param uid: Unique ID of the listed file
+        :return:
+        """
+
+        with self.lock:
+            path = self.uid_paths.pop(uid, None)
+            if path is None:
+                return
+
+            self.total -= self.path_sizes[path]
+            self.path_counts[path] -= 1
+            if self.path_counts[path] == 0:
+                self.path_counts.pop(path)
+
+    def reset(self, file_info: Optional[list[tuple[str, str, int]]] = None) -> None:
+        """
+        Rebuild the total from a file list (or clear it). Cached sizes are kept.
+
+        :param file_info: List of (full path, file name, unique ID) tuples
+        :return:
+        """
+
+        with self.lock:
+            self.uid_paths.clear()
+            self.path_counts.clear()
+            self.total = 0
+            for path, _, uid in file_info if file_info is not None else []:
+                self._add(uid, path)
+
+    def refresh(self) -> None:
+        """Queue every listed file to have its size checked again."""
+
+        with self.lock:
+            paths = list(self.path_counts.keys())
+            self.last_refresh = time.monotonic()
+
+        for path in paths:
+            self.pending.put(path)
+
+    def poll(self) -> bool:
+        """
+        Apply size results from the background thread and start a refresh if one is due. Call from the window thread.
+
+        :return: True if the total changed
+        """
+
+        changed = False
+        while True:
+            try:
+                path, size = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self.lock:
+                old_size = self.path_sizes.get(path, 0)
+                self.path_sizes.update({path: size})
+                if size != old_size and path in self.path_counts.keys():
+                    self.total += (size - old_size) * self.path_counts[path]
+                    changed = True
+
+        if time.monotonic() - self.last_refresh > self.refresh_interval:
+            self.refresh()
+
+        return changed
@@ -0,0 +1,251 @@
+"""
+Temporary-file store for the stream data of a PdfWriter, used to cap the memory held by a large merge.
+
+pypdf keeps the data of every stream copied into a PdfWriter in memory until it is written. Once the streams held in
+memory pass the memory budget, the oldest large streams are moved to an anonymous temporary file and replaced in the
+writer by spilled stream objects, which read their data back from the file only when it is used and copy it to the
+output in blocks when the writer is written.
+"""
+
+import tempfile
+import threading
+from collections import deque
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+
+from pypdf import PdfWriter
+from pypdf.generic import (DecodedStreamObject, DictionaryObject, EncodedStreamObject, NameObject, NumberObject,
+                           PdfObject, StreamObject)
+
+# Streams smaller than this are never spilled (the dictionary and object overhead would dominate)
+min_spill_size = 64 * 1024
+
+# Bytes copied from the spill file at a time when a spilled stream is written
+copy_block_size = 1024 ** 2
+
+
+class SpilledData:
+    """
+    Mixin for stream objects whose data is kept in a SpillStore. The data is read back each time _data is used (pypdf
+    accesses stream data only through _data), so it is never held by the object.
+    """
+
+    def __init__(self, store: "SpillStore") -> None:
+        """
+        Create an empty spilled stream.
+
+        :param store: SpillStore holding the data
+        """
+
+        self.store = store
+        self.spill_offset = 0
+        self.spill_length = 0
+        super().__init__()
+
+    @property
+    def _data(self) -> bytes:
+        return self.store.read(self.spill_offset, self.spill_length)
+
+    @_data.setter
+    def _data(self, data: bytes) -> None:
+        self.spill_offset, self.spill_length = self.store.append(data)
+
+    def measure(self) -> int:
+        """
+        Measure the written size of the object without reading its data back.
+
+        :return: Size in bytes of the dictionary, stream keywords, and data
+        """
+
+        self[NameObject("/Length")] = NumberObject(self.spill_length)
+        buffer = BytesIO()
+        DictionaryObject.write_to_stream(self, buffer)
+        del self["/Length"]
+        return len(buffer.getbuffer()) + len(b"\nstream\n") + self.spill_length + len(b"\nendstream")
+
+    def write_to_stream(self, stream: BinaryIO, encryption_key: Union[str, bytes, None] = None) -> None:
+        """
+        Write the object, copying the data from the spill file in blocks instead of reading it back all at once.
+
+        :param stream: Binary output stream
+        :param encryption_key: Not used (deprecated by pypdf)
+        :return:
+        """
+
+        self[NameObject("/Length")] = NumberObject(self.spill_length)
+        DictionaryObject.write_to_stream(self, stream)
+        del self["/Length"]
+        stream.write(b"\nstream\n")
+        self.store.copy_to(stream, self.spill_offset, self.spill_length)
+        stream.write(b"\nendstream")
+
+
+class SpilledEncodedStream(SpilledData, EncodedStreamObject):
+    """Spilled stream with filters (data stored encoded)."""
+
+
+class SpilledDecodedStream(SpilledData, DecodedStreamObject):
+    """Spilled stream without filters."""
+
+
+# Stream classes that can be spilled (subclasses such as ContentStream keep other state and are left in memory)
+spill_classes = {EncodedStreamObject: SpilledEncodedStream, DecodedStreamObject: SpilledDecodedStream}
+
+
+class SpillStore:
+    """Append-only temporary file of stream data, with the accounting used to keep a writer within a memory budget."""
+
+    def __init__(self, memory_budget: int, directory: Optional[str] = None) -> None:
+        """
+        Create an empty store. The temporary file is created when the first stream is spilled.
+
+        :param memory_budget: Maximum total size (bytes) of the stream data kept in memory by the writer
+        :param directory: Folder for the temporary file (the system temporary folder if not specified)
+        """
+
+        self.memory_budget = memory_budget
+        self.directory = directory
+        self.file = None
+        self.size = 0  # Bytes in the temporary file
+        self.lock = threading.Lock()  # Spilled data may be read by worker threads (e.g. stream recompression)
+
+        # Accounting for the writer's in-memory streams
+        self.memory_bytes = 0  # Stream data held in memory
+        self.candidates = deque()  # Object indices of in-memory streams that can be spilled, oldest first
+        self.checked = 0  # Number of writer objects already counted
+
+        # Counters
+        self.streams_spilled = 0
+        self.bytes_spilled = 0
+
+    def append(self, data: bytes) -> tuple[int, int]:
+        """
+        Add data to the end of the temporary file.
+
+        :param data: Stream data
+        :return: Tuple of (offset, length) of the data in the file
+        """
+
+        if len(data) == 0:
+            return 0, 0
+
+        with self.lock:
+            if self.file is None:
+                self.file = tempfile.TemporaryFile(dir=self.directory)
+            offset = self.size
+            self.file.seek(offset)
+            self.file.write(data)
+            self.size += len(data)
+
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> bytes:
+        """
+        Read data back from the temporary file.
+
+        :param offset: Offset of the data in the file
+        :param length: Length of the data
+        :return: Stream data
+        """
+
+        if length == 0:
+            return b""
+
+        with self.lock:
+            self.file.seek(offset)
+            return self.file.read(length)
+
+    def copy_to(self, stream: BinaryIO, offset: int, length: int) -> None:
+        """
+        Copy data from the temporary file to an output stream in blocks.
+
+        :param stream: Binary output stream
+        :param offset: Offset of the data in the file
+        :param length: Length of the data
+        :return:
+        """
+
+        position = offset
+        while position < offset + length:
+            block = self.read(position, min(copy_block_size, offset + length - position))
+            stream.write(block)
+            position += len(block)
+
+    def spill(self, writer: PdfWriter, index: int) -> int:
+        """
+        Move the data of one stream to the temporary file, replacing the stream in the writer.
+
+        :param writer: PdfWriter holding the stream
+        :param index: Index of the stream in the writer's object list
+        :return: Bytes of stream data removed from memory (0 if the object cannot be spilled)
+        """
+
+        old = writer._objects[index]
+        if type(old) not in spill_classes.keys():
+            return 0
+
+        data = old._data
+        new = spill_classes[type(old)](self)
+        new.update(old.items())
+        new._data = data
+        new.indirect_reference = old.indirect_reference
+        writer._objects[index] = new
+
+        self.streams_spilled += 1
+        self.bytes_spilled += len(data)
+        return len(data)
+
+    @staticmethod
+    def in_memory_size(obj: Optional[PdfObject]) -> int:
+        """
+        Get the size of the stream data an object holds in memory.
+
+        :param obj: Writer object
+        :return: Stream data length for in-memory streams, 0 otherwise
+        """
+
+        if not isinstance(obj, StreamObject) or isinstance(obj, SpilledData):
+            return 0
+        return len(obj._data or b"")
+
+    def track(self, writer: PdfWriter) -> None:
+        """
+        Count the streams added to the writer since the last call, then spill the oldest large streams until the
+        streams in memory are within the budget.
+
+        :param writer: PdfWriter being assembled
+        :return:
+        """
+
+        objects = writer._objects
+        for i in range(self.checked, len(objects)):
+            size = self.in_memory_size(objects[i])
+            self.memory_bytes += size
+            if size >= min_spill_size and type(objects[i]) in spill_classes.keys():
+                self.candidates.append(i)
+        self.checked = len(objects)
+
+        while self.memory_bytes > self.memory_budget and len(self.candidates) > 0:
+            i = self.candidates.popleft()
+            self.memory_bytes -= self.spill(writer, i)
+
+    def rescan(self, writer: PdfWriter) -> None:
+        """
+        Count every object in the writer again (e.g. after streams were replaced), then spill streams if needed.
+
+        :param writer: PdfWriter holding the streams
+        :return:
+        """
+
+        self.memory_bytes = 0
+        self.candidates.clear()
+        self.checked = 0
+        self.track(writer)
+
+    def close(self) -> None:
+        """Close (and delete) the temporary file. Spilled streams can no longer be read."""
+
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,104 @@
+"""
+Flate (zlib) recompression of the streams in a PdfWriter before it is written.
+
+Uncompressed streams and streams compressed only with FlateDecode (e.g. weakly compressed content streams from some
+scanners) are deflated again at the chosen level. zlib releases the GIL while it works, so the streams are compressed
+on a thread pool. A stream is only replaced if the result is smaller.
+"""
+
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, EncodedStreamObject, NameObject, StreamObject
+
+
+def recompress_data(data: bytes, is_flate: bool, level: int) -> bytes:
+    """
+    Deflate stream data (inflating it first if it is already Flate-compressed). Runs on a worker thread.
+
+    :param data: Stream data as stored in the writer
+    :param is_flate: Flag for whether the data is Flate-compressed
+    :param level: zlib compression level (1-9)
+    :return: Compressed data (empty if the data could not be inflated)
+    """
+
+    try:
+        return zlib.compress(zlib.decompress(data) if is_flate else data, level)
+    except zlib.error:  # Damaged stream; leave it as-is
+        return b""
+
+
+def recompress_streams(writer: PdfWriter, level: int = 6, max_workers: int = 0, batch_bytes: int = 0,
+                       after_batch: Optional[Callable[[], None]] = None, first_index: int = 0) -> tuple[int, int]:
+    """
+    Recompress the uncompressed and Flate-only streams of a writer on a thread pool.
+
+    Streams with other filters (e.g. DCTDecode images), decode parameters, or an XRef/Metadata type are not changed.
+
+    :param writer: Assembled PdfWriter
+    :param level: zlib compression level (1-9)
+    :param max_workers: Maximum number of threads (0 uses one per CPU core)
+    :param batch_bytes: Approximate amount of stream data (bytes) read and compressed at a time (0 for all at once)
+    :param after_batch: Called after the streams of each batch are replaced (e.g. to spill them to disk)
+    :param first_index: Index of the first writer object to check (e.g. to only check the objects of the latest file)
+    :return: Tuple of (number of streams replaced, bytes saved)
+    """
+
+    # Find candidate streams (data is read batch by batch)
+    candidates = []  # (object index, Flate-compressed flag) tuples
+    for i in range(first_index, len(writer._objects)):
+        obj = writer._objects[i]
+        if not isinstance(obj, StreamObject) or obj.get("/Type") in ("/XRef", "/Metadata") or "/DecodeParms" in obj:
+            continue
+
+        stream_filter = obj.get("/Filter")
+        if stream_filter is None:
+            candidates.append((i, False))
+        elif stream_filter == "/FlateDecode" or (isinstance(stream_filter, ArrayObject) and
+                                                 list(stream_filter) == ["/FlateDecode"]):
+            candidates.append((i, True))
+
+    if len(candidates) == 0:
+        return 0, 0
+
+    # Compress each batch on worker threads and replace streams that became smaller
+    replaced = 0
+    saved = 0
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        batch = []  # (object index, stream data, Flate-compressed flag) tuples
+        batch_size = 0
+        for n, (i, is_flate) in enumerate(candidates):
+            obj = writer._objects[i]
+            data = obj._data if is_flate or isinstance(obj, EncodedStreamObject) else obj.get_data()
+            batch.append((i, data, is_flate))
+            batch_size += len(data)
+            if batch_size < batch_bytes and n < len(candidates) - 1:
+                continue
+
+            results = executor.map(recompress_data, [data for _, data, _ in batch],
+                                   [is_flate for _, _, is_flate in batch], [level] * len(batch))
+            for (j, data, _), compressed in zip(batch, results):
+                if len(compressed) == 0 or len(compressed) >= len(data):
+                    continue
+
+                # Replace with an encoded stream using the same object number
+                old = writer._objects[j]
+                new = EncodedStreamObject()
+                new.update({key: value for key, value in old.items() if key not in ("/Filter", "/Length")})
+                new[NameObject("/Filter")] = NameObject("/FlateDecode")
+                new._data = compressed
+                new.indirect_reference = old.indirect_reference
+                writer._objects[j] = new
+
+                replaced += 1
+                saved += len(data) - len(compressed)
+
+            batch = []
+            batch_size = 0
+            if after_batch is not None:
+                after_batch()
+
+    return replaced, saved
@@ -0,0 +1,117 @@
+"""
+Output mode that writes the stream objects of a PdfWriter while files are still being added.
+
+Stream data (page contents, images, fonts, etc.) is most of a merged file, and pypdf never changes a stream once it has
+been copied into a writer. After each file is added, its new streams are written to the output and replaced in the
+writer by small placeholders, so the writer keeps only dictionaries (pages, resources, the page tree, outlines, etc.)
+and the byte offset of each written object. Dictionaries can still be changed by later files (e.g. the page tree, or
+outlines and form fields imported from later files), so they are written with the cross-reference table and trailer once
+the last file has been added.
+"""
+
+from typing import BinaryIO
+
+from pypdf import PdfWriter
+from pypdf.generic import NullObject, PdfObject, StreamObject
+
+
+class StreamingWriter:
+    """Writes a PdfWriter's objects to a stream in two parts: streams as files are added, then everything else."""
+
+    def __init__(self, writer: PdfWriter, stream: BinaryIO) -> None:
+        """
+        Write the file header.
+
+        :param writer: PdfWriter that files are being added to
+        :param stream: Binary output stream (must support tell)
+        """
+
+        self.writer = writer
+        self.stream = stream
+        self.offsets = {}  # Byte offset of each object written so far keyed by object number
+        self.flushed = 0  # Number of writer objects already checked by flush
+        self.finished = False
+
+        stream.write(writer.pdf_header.encode() + b"\n")
+        stream.write(b"%\xE2\xE3\xCF\xD3\n")
+
+    def write_object(self, idnum: int, obj: PdfObject) -> None:
+        """
+        Write one object and record its offset.
+
+        :param idnum: Object number
+        :param obj: Object to write
+        :return:
+        """
+
+        self.offsets.update({idnum: self.stream.tell()})
+        self.stream.write(f"{idnum} 0 obj\n".encode())
+        obj.write_to_stream(self.stream)
+        self.stream.write(b"\nendobj\n")
+
+    def flush(self) -> int:
+        """
+        Write the stream objects added to the writer since the last call and replace them with placeholders.
+
+        :return: Number of objects written
+        """
+
+        objects = self.writer._objects
+        written = 0
+        for i in range(self.flushed, len(objects)):
+            obj = objects[i]
+            if not isinstance(obj, StreamObject):
+                continue
+
+            self.write_object(i + 1, obj)
+            written += 1
+
+            # Placeholder keeps the object number for references to the object by later files
+            placeholder = NullObject()
+            placeholder.indirect_reference = obj.indirect_reference
+            objects[i] = placeholder
+
+        self.flushed = len(objects)
+        return written
+
+    def finish(self) -> None:
+        """
+        Write the objects not written yet, the cross-reference table, and the trailer. Only the first call writes.
+
+        :return:
+        """
+
+        if self.finished:
+            return
+
+        self.writer._resolve_links()  # Done by PdfWriter.write_stream for the standard output mode
+
+        # Remaining objects
+        object_positions = []
+        free_objects = []
+        for idnum, obj in enumerate(self.writer._objects, start=1):
+            if idnum in self.offsets.keys():
+                object_positions.append(self.offsets[idnum])
+            elif obj is not None:
+                self.write_object(idnum, obj)
+                object_positions.append(self.offsets[idnum])
+            else:
+                object_positions.append(-1)
+                free_objects.append(idnum)
+        free_objects.append(0)
+
+        # Cross-reference table and trailer (same format as PdfWriter.write)
+        xref_location = self.writer._write_xref_table(self.stream, object_positions, free_objects)
+        self.writer._write_trailer(self.stream, xref_location)
+        self.finished = True
+
+    def total_objects(self) -> int:
+        """
+        Count the objects the finished file will contain (for progress reporting).
+
+        :return: Number of objects written so far plus the objects still to be written by finish
+        """
+
+        remaining = sum(1 for idnum, obj in enumerate(self.writer._objects, start=1)
+                        if obj is not None and idnum not in self.offsets.keys())
+        return len(self.offsets) + remaining
@@ -9,7 +9,7 @@ import platform
 import shutil
 
 # Global variables
-version = "1.4"
+version = "1.5"
 
 # Default preferences
 default_pref = {"Font Type": "Times New Roman",
@@ -21,7 +21,8 @@ default_pref = {"Font Type": "Times New Roman",
                 "Add Blank Page Between Files": True,
                 "Shortcut Prompt": True,
                 "Desktop Shortcut": "",
-                "Start Menu Shortcut": ""}
+                "Start Menu Shortcut": "",
+                **default_engine_pref}  # Merge engine settings (see MergeEngine.py)
 
 # Create folder for files if not already present
 if not os.path.exists(f"{os.path.dirname(sys.argv[0])}\\Files"):
@@ -393,5 +394,5 @@ def __main__():
     win.mainloop()
 
 
-if __name__ == __main__():
+if __name__ == "__main__":  # Guard needed so merge worker processes do not relaunch the window
     __main__()
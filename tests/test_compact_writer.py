@@ -0,0 +1,33 @@
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, NameObject
+
+from CompactWriter import can_use_object_streams, compact_object_count, write_compact
+
+
+def make_writer(page_count):
+    writer = PdfWriter()
+    for i in range(page_count):
+        page = writer.add_blank_page(width=612, height=792)
+        contents = DecodedStreamObject()
+        contents.set_data(f"BT /F1 12 Tf 72 720 Td (Page {i + 1}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(contents)
+    return writer
+
+
+def test_write_compact_round_trip():
+    writer = make_writer(25)
+    assert can_use_object_streams(writer)
+    expected_count = compact_object_count(writer, objects_per_stream=10)
+
+    output = BytesIO()
+    write_compact(writer, output, objects_per_stream=10)
+    data = output.getvalue()
+
+    reader = PdfReader(BytesIO(data), strict=True)
+    assert len(reader.pages) == 25
+    assert [page.get_contents().get_data() for page in reader.pages] == \
+        [f"BT /F1 12 Tf 72 720 Td (Page {i + 1}) Tj ET".encode() for i in range(25)]
+    assert "/XRef" in data.decode("latin-1") and "/ObjStm" in data.decode("latin-1")
+    assert data.count(b"endobj") == expected_count
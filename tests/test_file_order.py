@@ -0,0 +1,61 @@
+import itertools
+
+import pytest
+
+from FileOrder import apply_move, move_targets
+
+
+def move(items, selected, mode, combine):
+    items = list(items)
+    changed = apply_move(items, selected, move_targets(selected, len(items), mode, combine))
+    return "".join(items), changed
+
+
+@pytest.mark.parametrize("mode, combine, selected, expected", [
+    ("top", False, [2, 4], "caebdfg"),
+    ("top", True, [2, 4], "ceabdfg"),
+    ("bottom", False, [2, 4], "abdfcge"),
+    ("bottom", True, [2, 4], "abdfgce"),
+    ("up", False, [2, 4], "acbedfg"),
+    ("up", True, [1, 3, 5], "abdfceg"),
+    ("down", False, [2, 4], "abdcfeg"),
+    ("down", True, [1, 3, 5], "acebdfg"),
+])
+def test_moves(mode, combine, selected, expected):
+    assert move("abcdefg", selected, mode, combine)[0] == expected
+
+
+def test_up_blocked_at_top():
+    # The first entry cannot move, so the entry behind it stays too; the third moves up by one
+    assert move_targets([0, 1, 3], 7, "up", False) == [0, 1, 2]
+    assert move("abcdefg", [0, 1, 3], "up", False) == ("abdcefg", (0, 4))
+
+
+def test_down_blocked_at_bottom():
+    assert move_targets([4, 6], 7, "down", False) == [5, 6]
+    assert move("abcdefg", [4, 6], "down", False) == ("abcdfeg", (4, 7))
+
+
+def test_nothing_moved():
+    assert move("abcdefg", [], "up", False) == ("abcdefg", (0, 0))
+    assert move("abcdefg", [0, 1], "top", True) == ("abcdefg", (0, 0))
+    assert move("abcdefg", [6], "down", False) == ("abcdefg", (0, 0))
+
+
+@pytest.mark.parametrize("mode", ["top", "up", "down", "bottom"])
+@pytest.mark.parametrize("combine", [False, True])
+def test_every_selection(mode, combine):
+    items = "abcdef"
+    for size in range(1, len(items) + 1):
+        for selected in itertools.combinations(range(len(items)), size):
+            selected = list(selected)
+            targets = move_targets(selected, len(items), mode, combine)
+            result, (start, stop) = move(items, selected, mode, combine)
+
+            assert targets == sorted(set(targets)) and 0 <= targets[0] and targets[-1] < len(items)
+            assert [result[target] for target in targets] == [items[index] for index in selected]
+            assert [c for c in result if items.index(c) not in selected] == \
+                [c for i, c in enumerate(items) if i not in selected]
+            assert result[:start] == items[:start] and result[stop:] == items[stop:]
+            if mode in ("up", "down") and not combine:
+                assert all(abs(target - index) <= 1 for index, target in zip(selected, targets))
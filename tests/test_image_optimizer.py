@@ -0,0 +1,73 @@
+import zlib
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject, NumberObject
+
+from ImageOptimizer import find_page_images, optimize_images
+
+pytest.importorskip("PIL")
+
+
+def add_image(writer, width, height):
+    data = bytes((x * 7 + y * 3) % 256 for y in range(height) for x in range(width) for _ in range(3))
+    image = DecodedStreamObject()
+    image.set_data(zlib.compress(data))
+    image.update({NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Image"),
+                  NameObject("/Width"): NumberObject(width), NameObject("/Height"): NumberObject(height),
+                  NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+                  NameObject("/BitsPerComponent"): NumberObject(8),
+                  NameObject("/Filter"): NameObject("/FlateDecode")})
+    return writer._add_object(image)
+
+
+def add_page(writer, content, xobjects):
+    page = writer.add_blank_page(width=612, height=792)  # Letter size (8.5 x 11 inches)
+    contents = DecodedStreamObject()
+    contents.set_data(content)
+    page[NameObject("/Contents")] = writer._add_object(contents)
+    page[NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/XObject"): DictionaryObject({NameObject(name): ref for name, ref in xobjects.items()})})
+    return page
+
+
+def test_small_placement_is_downsampled():
+    writer = PdfWriter()
+    image = add_image(writer, 600, 600)
+    add_page(writer, b"q 72 0 0 72 100 100 cm /Im0 Do Q", {"/Im0": image})  # 1 x 1 inch: 600 dpi
+
+    assert round(find_page_images(writer)[image.idnum]) == 600
+
+    results = optimize_images(writer, target_dpi=200, max_workers=1)
+
+    assert [idnum for idnum, *_ in results] == [image.idnum]
+    assert writer.get_object(image.idnum)["/Width"] == 200
+    assert writer.get_object(image.idnum)["/Height"] == 200
+
+
+def test_largest_placement_is_used():
+    writer = PdfWriter()
+    image = add_image(writer, 600, 600)
+    add_page(writer, b"q 72 0 0 72 0 0 cm /Im0 Do Q", {"/Im0": image})  # 600 dpi
+    add_page(writer, b"q 432 0 0 432 0 0 cm /Im0 Do Q", {"/Im0": image})  # 6 x 6 inches: 100 dpi
+
+    assert round(find_page_images(writer)[image.idnum]) == 100
+    assert optimize_images(writer, target_dpi=200, max_workers=1) == []
+
+
+def test_form_xobject_placement():
+    writer = PdfWriter()
+    image = add_image(writer, 600, 600)
+    form = DecodedStreamObject()
+    form.set_data(b"q 144 0 0 144 0 0 cm /Im0 Do Q")  # 2 x 2 inches in form space
+    form.update({NameObject("/Type"): NameObject("/XObject"), NameObject("/Subtype"): NameObject("/Form"),
+                 NameObject("/BBox"): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(144),
+                                                   NumberObject(144)]),
+                 NameObject("/Matrix"): ArrayObject([FloatObject(0.5), NumberObject(0), NumberObject(0),
+                                                     FloatObject(0.5), NumberObject(0), NumberObject(0)]),
+                 NameObject("/Resources"): DictionaryObject(
+                     {NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): image})})})
+    form_reference = writer._add_object(form)
+    add_page(writer, b"q 1 0 0 1 50 50 cm /Fm0 Do Q", {"/Fm0": form_reference})  # Form halves the image: 1 inch
+
+    assert round(find_page_images(writer)[image.idnum]) == 600
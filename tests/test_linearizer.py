@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+from pypdf import PdfWriter
+
+import MergeEngine
+from Linearizer import check_linearization, linearize_file
+
+pikepdf = pytest.importorskip("pikepdf")
+
+
+def make_pdf(path, pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as file:
+        writer.write(file)
+
+
+def test_check_linearization_keeps_stderr(tmp_path):
+    path = tmp_path / "input.pdf"
+    make_pdf(path, 3)
+    linearize_file(str(path))
+
+    stderr = sys.stderr
+    passed, report = check_linearization(str(path))
+
+    assert sys.stderr is stderr
+    assert passed
+    assert report == ""
+
+
+def test_check_linearization_reports_problems(tmp_path):
+    path = tmp_path / "input.pdf"
+    make_pdf(path, 3)
+    linearize_file(str(path))
+
+    # Change the page count in the linearization dictionary without changing any offsets
+    data = path.read_bytes()
+    path.write_bytes(data.replace(b"/N 3", b"/N 4", 1))
+
+    passed, report = check_linearization(str(path))
+
+    assert not passed
+    assert "/N does not match number of pages" in report
+
+
+def test_cli_messages_after_linearize(tmp_path, capsys):
+    make_pdf(tmp_path / "input.pdf", 2)
+    manifest = tmp_path / "list.txt"
+    manifest.write_text(f"{tmp_path / 'input.pdf'}\n{tmp_path / 'missing.pdf'}\n")
+
+    assert MergeEngine.main([str(manifest), str(tmp_path / "output.pdf"), "--linearize"]) == 0
+    print("after merge", file=sys.stderr)
+
+    captured = capsys.readouterr()
+    assert "The file \"missing.pdf\" was not found and was skipped." in captured.err
+    assert "after merge" in captured.err
+    assert "The output was linearized and its hint tables were verified." in captured.out
@@ -0,0 +1,73 @@
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject,
+                           NumberObject, TextStringObject)
+
+from ObjectIndex import ObjectIndex
+
+
+def make_form(path, name):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")}))
+    page = writer.add_blank_page(width=612, height=792)
+    contents = DecodedStreamObject()
+    contents.set_data(b"BT /Helv 12 Tf 72 720 Td (Form) Tj ET")
+    page[NameObject("/Contents")] = writer._add_object(contents)
+    page[NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/Helv"): font})})
+
+    field = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Annot"), NameObject("/Subtype"): NameObject("/Widget"),
+        NameObject("/FT"): NameObject("/Tx"), NameObject("/T"): TextStringObject(name),
+        NameObject("/Rect"): ArrayObject([NumberObject(72), NumberObject(600), NumberObject(300), NumberObject(620)]),
+        NameObject("/DA"): TextStringObject("/Helv 12 Tf 0 g"), NameObject("/P"): page.indirect_reference}))
+    page[NameObject("/Annots")] = ArrayObject([field])
+    writer._root_object[NameObject("/AcroForm")] = writer._add_object(DictionaryObject({
+        NameObject("/Fields"): ArrayObject([field]),
+        NameObject("/DR"): DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/Helv"): font})}),
+        NameObject("/DA"): TextStringObject("/Helv 0 Tf 0 g")}))
+    writer.write(path)
+
+
+def check_references(writer, obj, visited):
+    if isinstance(obj, IndirectObject):
+        if obj.idnum in visited:
+            return
+        visited.add(obj.idnum)
+        target = writer._objects[obj.idnum - 1]
+        assert target is not None, f"Reference to removed object {obj.idnum}"
+        check_references(writer, target, visited)
+    elif isinstance(obj, DictionaryObject):
+        for value in obj.values():
+            check_references(writer, value, visited)
+    elif isinstance(obj, ArrayObject):
+        for value in obj:
+            check_references(writer, value, visited)
+
+
+def test_forms_sharing_a_font(tmp_path):
+    make_form(tmp_path / "a.pdf", "first")
+    make_form(tmp_path / "b.pdf", "second")
+    writer = PdfWriter()
+    index = ObjectIndex(writer)
+
+    first = PdfReader(tmp_path / "a.pdf")
+    writer.append(first)
+    assert index.deduplicate(first, "a.pdf")[0] == 0
+
+    # Add the second form's font to the merged form's default resources (an object added with the first file), as
+    # merging the forms' resources would
+    second = PdfReader(tmp_path / "b.pdf")
+    writer.append(second)
+    fonts = writer._root_object["/AcroForm"]["/DR"]["/Font"]
+    second_font = IndirectObject(writer._id_translated[id(second)][second.root_object["/AcroForm"]["/DR"]["/Font"]
+                                                                  .raw_get("/Helv").idnum], 0, writer)
+    fonts[NameObject("/Helv2")] = second_font
+    removed, _ = index.deduplicate(second, "b.pdf")
+
+    assert removed >= 1
+    assert fonts.raw_get("/Helv2") == fonts.raw_get("/Helv")
+    assert fonts["/Helv2"]["/BaseFont"] == "/Helvetica"
+    assert writer.pages[1]["/Resources"]["/Font"].raw_get("/Helv") == fonts.raw_get("/Helv")
+    check_references(writer, writer._root_object.indirect_reference, set())
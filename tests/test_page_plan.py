@@ -0,0 +1,51 @@
+import random
+
+from PagePlan import PagePlan
+
+
+def test_from_string():
+    assert PagePlan.from_string("1-5,8,,10-12").ranges == [(1, 5, 1), (8, 8, 1), (10, 12, 1)]
+    assert list(PagePlan.from_string("3,1-2")) == [3, 1, 2]
+    assert PagePlan.from_string("2-1").ranges == []  # Reversed ranges are dropped
+
+
+def test_large_duplicate_ranges_stay_compact():
+    plan = PagePlan.from_string("1-40000,1-40000", remove_dup=True)
+    assert plan.ranges == [(1, 40000, 1)]
+    assert len(plan) == 40000
+    assert plan.covers_all(40000)
+
+    plan = PagePlan.from_string("1-40000,1-40000", resort=True)
+    assert plan.ranges == [(1, 40000, 2)]
+    assert len(plan) == 80000
+    assert not plan.covers_all(40000)
+
+
+def test_unique_and_sorted_match_page_lists():
+    rng = random.Random(7)
+    for _ in range(500):
+        items = []
+        for _ in range(rng.randint(1, 6)):
+            first = rng.randint(1, 30)
+            last = first + rng.randint(0, 10)
+            items.append(str(first) if first == last else f"{first}-{last}")
+        page_str = ",".join(items)
+        pages = list(PagePlan.from_string(page_str))
+
+        assert list(PagePlan.from_string(page_str, remove_dup=True)) == list(dict.fromkeys(pages)), page_str
+        assert list(PagePlan.from_string(page_str, resort=True)) == sorted(pages), page_str
+        assert list(PagePlan.from_string(page_str, resort=True, remove_dup=True)) == sorted(set(pages)), page_str
+
+
+def test_runs():
+    assert list(PagePlan.from_string("1-3,4-6,8,9,3").runs()) == [(1, 6), (8, 9), (3, 3)]
+    assert list(PagePlan.from_string("5-4,2,2").runs()) == [(2, 2), (2, 2)]
+    assert list(PagePlan.from_string("1-2,1-3", resort=True).runs()) == [(1, 1), (1, 2), (2, 3)]
+
+
+def test_covers_all():
+    assert PagePlan.from_string("1-3,4-10").covers_all(10)
+    assert PagePlan.from_string("1,2,3").covers_all(3)
+    assert not PagePlan.from_string("1-10").covers_all(11)
+    assert not PagePlan.from_string("2-10,1").covers_all(10)
+    assert not PagePlan.from_string("1-5,5-10").covers_all(10)
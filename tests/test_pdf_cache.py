@@ -0,0 +1,63 @@
+import threading
+
+from pypdf import PdfWriter
+
+import PdfCache
+from PdfCache import PdfCache as Cache
+
+
+def make_pdf(path, pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as file:
+        writer.write(file)
+
+
+def test_get_metadata_does_not_block_other_files(tmp_path, monkeypatch):
+    small = str(tmp_path / "small.pdf")
+    large = str(tmp_path / "large.pdf")
+    make_pdf(small, 1)
+    make_pdf(large, 2)
+
+    cache = Cache()
+    cache.get_metadata(small)
+
+    # Parsing the large file waits until the small file's metadata has been read from the cache
+    parsing = threading.Event()
+    release = threading.Event()
+    file_metadata = PdfCache.file_metadata
+
+    def slow_metadata(path, open_reader=None, with_hash=False):
+        if path == large:
+            parsing.set()
+            assert release.wait(timeout=10)
+        return file_metadata(path, open_reader, with_hash)
+
+    monkeypatch.setattr(PdfCache, "file_metadata", slow_metadata)
+
+    results = {}
+    thread = threading.Thread(target=lambda: results.update({"large": cache.get_metadata(large)}))
+    thread.start()
+    assert parsing.wait(timeout=10)
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (results.update({"small": cache.get_metadata(small)}), done.set())).start()
+    assert done.wait(timeout=5)  # Blocked until the large file finished if the lock were held while parsing
+
+    release.set()
+    thread.join(timeout=10)
+    assert results["small"]["pages"] == 1
+    assert results["large"]["pages"] == 2
+
+
+def test_get_reader_is_cached(tmp_path):
+    path = str(tmp_path / "input.pdf")
+    make_pdf(path, 3)
+
+    cache = Cache()
+    reader = cache.get_reader(path)
+
+    assert cache.get_reader(path) is reader
+    assert len(reader.pages) == 3
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,39 @@
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, NameObject, NullObject
+
+from StreamingWriter import StreamingWriter
+
+
+def add_pages(writer, first, last):
+    for number in range(first, last + 1):
+        page = writer.add_blank_page(width=612, height=792)
+        contents = DecodedStreamObject()
+        contents.set_data(f"BT /F1 12 Tf 72 720 Td (Page {number}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(contents)
+
+
+def test_streams_are_written_as_files_are_added():
+    writer = PdfWriter()
+    output = BytesIO()
+    streaming_writer = StreamingWriter(writer, output)
+
+    add_pages(writer, 1, 3)
+    assert streaming_writer.flush() == 3
+    assert all(isinstance(writer.get_object(page.raw_get("/Contents")), NullObject) for page in writer.pages)
+
+    # Pages added later are added to the page tree written by finish
+    add_pages(writer, 4, 5)
+    assert streaming_writer.flush() == 2
+    total_objects = streaming_writer.total_objects()
+    streaming_writer.finish()
+    size = len(output.getvalue())
+    streaming_writer.finish()  # Only the first call writes
+    assert len(output.getvalue()) == size
+
+    data = output.getvalue()
+    assert data.count(b"endobj") == total_objects
+    reader = PdfReader(BytesIO(data), strict=True)
+    assert [page.get_contents().get_data() for page in reader.pages] == \
+        [f"BT /F1 12 Tf 72 720 Td (Page {number}) Tj ET".encode() for number in range(1, 6)]